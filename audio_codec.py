@@ -0,0 +1,71 @@
+from typing import Iterable, List
+
+import numpy as np
+
+# Twilio media streams are 8 kHz mono G.711 μ-law, sent in 20 ms frames
+SAMPLE_RATE = 8000
+MULAW_FRAME_BYTES = 160  # 20 ms of 8 kHz mono μ-law
+MULAW_SILENCE = b"\xff"
+
+
+def _build_ulaw_table() -> np.ndarray:
+    """G.711 μ-law → 16-bit linear PCM for all 256 code words (matches audioop.ulaw2lin)."""
+    table = np.empty(256, dtype="<i2")
+    for code in range(256):
+        u = ~code & 0xFF
+        exponent = (u >> 4) & 0x07
+        mantissa = u & 0x0F
+        magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+        table[code] = -magnitude if u & 0x80 else magnitude
+    return table
+
+
+ULAW_TO_LINEAR = _build_ulaw_table()
+
+
+class MulawDecoder:
+    """
+    Decodes μ-law to little-endian 16-bit PCM with a single table lookup per batch.
+
+    The output buffer is reused between calls, so the returned memoryview is only valid
+    until the next `decode`; send or copy it before decoding again.
+    """
+
+    def __init__(self, capacity: int = MULAW_FRAME_BYTES * 10):
+        self._buffer = np.empty(capacity, dtype="<i2")
+
+    def decode(self, mulaw: bytes) -> memoryview:
+        n = len(mulaw)
+        if n > len(self._buffer):
+            self._buffer = np.empty(n, dtype="<i2")
+        out = self._buffer[:n]
+        np.take(ULAW_TO_LINEAR, np.frombuffer(mulaw, dtype=np.uint8), out=out)
+        return memoryview(out).cast("B")
+
+    def decode_frames(self, frames: Iterable[bytes]) -> memoryview:
+        return self.decode(b"".join(frames))
+
+
+class MulawFramer:
+    """Re-slices arbitrarily sized μ-law chunks into fixed 20 ms Twilio frames."""
+
+    def __init__(self, frame_bytes: int = MULAW_FRAME_BYTES):
+        self.frame_bytes = frame_bytes
+        self.pending = bytearray()
+
+    def push(self, chunk: bytes) -> List[bytes]:
+        self.pending += chunk
+        usable = len(self.pending) - len(self.pending) % self.frame_bytes
+        if not usable:
+            return []
+        frames = [bytes(self.pending[i:i + self.frame_bytes]) for i in range(0, usable, self.frame_bytes)]
+        del self.pending[:usable]
+        return frames
+
+    def flush(self) -> bytes:
+        # Pad the trailing partial frame with silence so every message is exactly 20 ms
+        if not self.pending:
+            return b""
+        frame = bytes(self.pending) + MULAW_SILENCE * (self.frame_bytes - len(self.pending))
+        self.pending.clear()
+        return frame
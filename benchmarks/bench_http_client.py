@@ -0,0 +1,142 @@
+"""
+Event-loop lag and TTS latency for the blocking `requests` path vs the shared pooled client.
+
+Runs against a local stand-in for Deepgram /v1/speak by default (fixed synthesis delay,
+μ-law body), or against a real endpoint with --url (uses DEEPGRAM_API_KEY and bills credits).
+
+    python benchmarks/bench_http_client.py
+    python benchmarks/bench_http_client.py --concurrency 1 10 50 --delay 0.3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_client import get_http_client, close_http_client  # noqa: E402
+
+
+async def fake_speak_server(delay: float, body_bytes: int):
+    """Minimal keep-alive HTTP/1.1 server that answers every POST after `delay` seconds."""
+    body = b"\xff" * body_bytes
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(delay)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: audio/basic\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: keep-alive\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/v1/speak"
+
+
+def start_fake_server_thread(delay: float, body_bytes: int) -> str:
+    """Runs the stand-in on its own loop so the blocking `requests` mode cannot stall it."""
+    ready = threading.Event()
+    result = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        result["server"], result["url"] = loop.run_until_complete(fake_speak_server(delay, body_bytes))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return result["url"]
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+def tts_requests(url, headers, payload):
+    import requests
+
+    return len(requests.post(url, headers=headers, json=payload).content)
+
+
+async def tts_pooled(url, headers, payload):
+    response = await get_http_client().post(url, headers=headers, json=payload)
+    return len(response.content)
+
+
+async def run(mode: str, url: str, concurrency: int, turns: int):
+    headers = {"Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY', 'local')}", "Content-Type": "application/json"}
+    payload = {"text": "Thank you. Can you give me the best email address for contacting you?"}
+    latencies, lag = [], []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag))
+
+    async def call():
+        for _ in range(turns):
+            start = time.perf_counter()
+            if mode == "requests":
+                # Reproduces the old in-loop synchronous call in send_tts_to_twilio
+                tts_requests(url, headers, payload)
+            else:
+                await tts_pooled(url, headers, payload)
+            latencies.append(time.perf_counter() - start)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall
+    stop.set()
+    await lag_task
+
+    def pct(values, q):
+        return sorted(values)[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+    print(
+        f"{mode:9} c={concurrency:<3} wall={wall:6.2f}s "
+        f"tts p50={pct(latencies, 0.5):7.1f}ms p95={pct(latencies, 0.95):7.1f}ms "
+        f"loop-lag mean={statistics.fmean(lag or [0]) * 1000:6.1f}ms max={max(lag or [0]) * 1000:7.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Real /v1/speak URL; defaults to a local stand-in")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--turns", type=int, default=3, help="TTS requests per simulated call")
+    parser.add_argument("--delay", type=float, default=0.2, help="Stand-in synthesis delay (s)")
+    parser.add_argument("--body-bytes", type=int, default=24000, help="Stand-in audio size (3 s of μ-law)")
+    parser.add_argument("--modes", nargs="+", default=["requests", "pooled"], choices=["requests", "pooled"])
+    args = parser.parse_args()
+
+    url = args.url or start_fake_server_thread(args.delay, args.body_bytes)
+
+    try:
+        for concurrency in args.concurrency:
+            for mode in args.modes:
+                await run(mode, url, concurrency, args.turns)
+    finally:
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Per-call cost of the stereo call recorder (call_recorder.CallRecorder).
+
+Simulates --calls concurrent calls of --seconds each: 20 ms caller frames, an agent
+reply burst every few seconds (sent faster than real time, as main.py does) and an
+occasional barge-in clear. Reports event-loop time per call, total CPU (including the
+writer thread), CPU as a share of one core per live call, and the memory each call holds
+in blocks. If pydub is installed, the archived AudioSegment mixing is measured too.
+
+    python benchmarks/bench_recorder.py
+    python benchmarks/bench_recorder.py --calls 100 --seconds 120 --block-s 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES, SAMPLE_RATE  # noqa: E402
+from call_recorder import CallRecorder, drain_recordings  # noqa: E402
+
+try:
+    from pydub import AudioSegment
+except ImportError:
+    AudioSegment = None
+
+FRAMES_PER_S = SAMPLE_RATE // MULAW_FRAME_BYTES
+
+
+def call_script(seconds: int):
+    """(kind, frame) events for one call: a 2 s agent reply every 5 s, every third one barged in."""
+    caller = os.urandom(MULAW_FRAME_BYTES)
+    agent = os.urandom(MULAW_FRAME_BYTES)
+    events = []
+    for i in range(seconds * FRAMES_PER_S):
+        events.append(("caller", caller))
+        if i % (5 * FRAMES_PER_S) == 0:
+            events.extend([("agent", agent)] * (2 * FRAMES_PER_S))
+        if i % (15 * FRAMES_PER_S) == FRAMES_PER_S:
+            events.append(("clear", None))
+    return events
+
+
+def run_recorder(events, calls, directory, block_s):
+    recorders = [CallRecorder(os.path.join(directory, f"call{i}.wav"), block_s) for i in range(calls)]
+    loop_time = 0.0
+    for kind, frame in events:
+        started = time.perf_counter()
+        for recorder in recorders:
+            if kind == "caller":
+                recorder.caller_audio(frame)
+            elif kind == "agent":
+                recorder.agent_audio(frame)
+            else:
+                recorder.agent_cleared()
+        loop_time += time.perf_counter() - started
+    for recorder in recorders:
+        recorder.close()
+    drain_recordings()
+    return loop_time, recorders
+
+
+def run_pydub(events, calls):
+    """The archived approach: bytearray buffers mixed with AudioSegment every 400 ms."""
+    chunk = 20 * 160
+    buffers = [(bytearray(), bytearray(), []) for _ in range(calls)]
+    for kind, frame in events:
+        for inbuffer, outbuffer, mixed in buffers:
+            if kind == "caller":
+                inbuffer.extend(frame)
+                if len(outbuffer) < len(inbuffer):
+                    outbuffer.extend(b"\xff" * (len(inbuffer) - len(outbuffer)))
+            elif kind == "agent":
+                outbuffer.extend(frame)
+            while len(inbuffer) >= chunk and len(outbuffer) >= chunk:
+                left = AudioSegment(inbuffer[:chunk], sample_width=1, frame_rate=8000, channels=1)
+                right = AudioSegment(outbuffer[:chunk], sample_width=1, frame_rate=8000, channels=1)
+                mixed.append(AudioSegment.from_mono_audiosegments(left, right).raw_data)
+                del inbuffer[:chunk]
+                del outbuffer[:chunk]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--block-s", type=float, default=5.0)
+    args = parser.parse_args()
+
+    events = call_script(args.seconds)
+    call_seconds = args.calls * args.seconds
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        cpu_started = time.process_time()
+        loop_time, recorders = run_recorder(events, args.calls, directory, args.block_s)
+        cpu = time.process_time() - cpu_started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(recorders[0].path)
+
+    stats = recorders[0].stats()
+    print(f"{args.calls} calls x {args.seconds} s, {args.block_s} s blocks")
+    print(f"recorder  loop {loop_time / args.calls * 1000:8.2f} ms/call   "
+          f"cpu {cpu / call_seconds * 100:6.3f}% of a core per call   "
+          f"{loop_time / len(events) / args.calls * 1e6:5.2f} µs/event")
+    print(f"          {stats['blocks_allocated']} blocks = {stats['buffer_bytes'] / 1024:.0f} KiB held per call, "
+          f"peak traced {peak / args.calls / 1024:.0f} KiB per call, file {size / 1024:.0f} KiB")
+
+    if AudioSegment is None:
+        print("pydub not installed; skipping the archived AudioSegment baseline")
+        return
+    cpu_started = time.process_time()
+    run_pydub(events, args.calls)
+    cpu = time.process_time() - cpu_started
+    print(f"pydub     cpu {cpu / call_seconds * 100:6.3f}% of a core per call")
+
+
+if __name__ == "__main__":
+    main()
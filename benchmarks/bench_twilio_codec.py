@@ -0,0 +1,97 @@
+"""
+Replays a Twilio media stream through the old (json + base64) and new (twilio_codec) paths.
+
+The capture is one raw Twilio websocket message per line. Without one, a synthetic
+stream of --seconds of 20 ms media frames is generated.
+
+    python benchmarks/bench_twilio_codec.py
+    python benchmarks/bench_twilio_codec.py captures/call.jsonl
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES  # noqa: E402
+from twilio_codec import MediaSerializer, parse_message  # noqa: E402
+
+STREAM_SID = "MZ00000000000000000000000000000000"
+
+
+def synthetic_stream(seconds: int):
+    messages = [json.dumps({"event": "start", "start": {"streamSid": STREAM_SID}, "streamSid": STREAM_SID})]
+    for i in range(seconds * 50):
+        messages.append(json.dumps({
+            "event": "media",
+            "sequenceNumber": str(i + 2),
+            "media": {"track": "inbound", "chunk": str(i + 1), "timestamp": str(i * 20),
+                      "payload": base64.b64encode(os.urandom(MULAW_FRAME_BYTES)).decode("ascii")},
+            "streamSid": STREAM_SID,
+        }, separators=(",", ":")))
+    messages.append(json.dumps({"event": "stop", "streamSid": STREAM_SID}))
+    return messages
+
+
+def old_inbound(messages):
+    for raw in messages:
+        data = json.loads(raw)
+        if data["event"] == "media":
+            base64.b64decode(data["media"]["payload"])
+
+
+def new_inbound(messages):
+    for raw in messages:
+        parse_message(raw)
+
+
+def old_outbound(frames):
+    for frame in frames:
+        json.dumps({"event": "media", "streamSid": STREAM_SID, "media": {"payload": base64.b64encode(frame).decode("ascii")}})
+
+
+def new_outbound(frames, serializer=MediaSerializer(STREAM_SID)):
+    for frame in frames:
+        serializer.media(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="?", help="File with one raw Twilio message per line")
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, encoding="utf-8") as f:
+            messages = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        messages = synthetic_stream(args.seconds)
+
+    frames = [media.audio for event, media, _ in map(parse_message, messages) if event == "media"]
+    for raw in messages:
+        data = json.loads(raw)
+        if data["event"] == "media":
+            media = parse_message(raw)[1]
+            assert media.audio == base64.b64decode(data["media"]["payload"])
+            assert (media.chunk, media.timestamp) == (int(data["media"]["chunk"]), int(data["media"]["timestamp"]))
+    assert json.loads(MediaSerializer(STREAM_SID).media(frames[0])) == {
+        "event": "media", "streamSid": STREAM_SID, "media": {"payload": base64.b64encode(frames[0]).decode("ascii")}
+    }
+
+    def report(name, fn, count):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:22} {best * 1000:8.2f} ms  {best / count * 1e6:6.2f} µs/message")
+
+    print(f"{len(messages)} inbound messages, {len(frames)} media frames")
+    report("inbound  json+base64", lambda: old_inbound(messages), len(messages))
+    report("inbound  twilio_codec", lambda: new_inbound(messages), len(messages))
+    report("outbound json.dumps", lambda: old_outbound(frames), len(frames))
+    report("outbound template", lambda: new_outbound(frames), len(frames))
+
+
+if __name__ == "__main__":
+    main()
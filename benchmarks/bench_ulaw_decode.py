@@ -0,0 +1,55 @@
+"""
+μ-law → PCM decode cost: per-frame audioop.ulaw2lin (old path) vs the NumPy lookup table.
+
+    python benchmarks/bench_ulaw_decode.py
+    python benchmarks/bench_ulaw_decode.py --seconds 60 --batch 1 5 10
+"""
+import argparse
+import os
+import sys
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES, MulawDecoder  # noqa: E402
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed in Python 3.13
+    audioop = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=30, help="Seconds of call audio per run")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 5, 10], help="Frames decoded per call")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    frames = [os.urandom(MULAW_FRAME_BYTES) for _ in range(args.seconds * 50)]
+    decoder = MulawDecoder()
+
+    if audioop is not None:
+        every_code = bytes(range(256))
+        assert audioop.ulaw2lin(every_code, 2) == bytes(decoder.decode(every_code))
+
+    def report(name, fn):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        per_frame_us = best / len(frames) * 1e6
+        print(f"{name:24} {best * 1000:8.2f} ms per {args.seconds}s of audio  {per_frame_us:6.2f} µs/frame")
+
+    if audioop is not None:
+        report("audioop per frame", lambda: [audioop.ulaw2lin(f, 2) for f in frames])
+    else:
+        print("audioop not available on this interpreter; skipping baseline")
+
+    for batch in args.batch:
+        batches = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+        report(f"numpy LUT batch={batch}", lambda: [decoder.decode_frames(b) for b in batches])
+
+
+if __name__ == "__main__":
+    main()
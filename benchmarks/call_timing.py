@@ -0,0 +1,70 @@
+"""
+Measurements shared by the call benchmarks (load_test.py, replay_capture.py): reply latency
+as a caller hears it, percentiles, and the server's CPU and memory from /proc.
+"""
+import os
+import time
+from typing import List, Optional, Tuple
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def process_cpu_s(pid: int) -> float:
+    """User + system CPU seconds of `pid` (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class ProcessSampler:
+    """CPU and RSS of a process from /proc (Linux)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.page_bytes = os.sysconf("SC_PAGE_SIZE")
+        self._last = process_cpu_s(pid), time.perf_counter()
+
+    def sample(self) -> Tuple[float, float]:
+        """CPU % since the last sample and RSS in MB."""
+        cpu, wall = process_cpu_s(self.pid), time.perf_counter()
+        last_cpu, last_wall = self._last
+        self._last = cpu, wall
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss = int(f.read().split()[1]) * self.page_bytes
+        return (cpu - last_cpu) / (wall - last_wall) * 100, rss / 1024 / 1024
+
+
+class ReplyLatency:
+    """
+    End of caller speech → first agent audio, per reply. A slow reply is preceded by the
+    app's filler, which it cuts with a clear right before the reply's first frame, so a
+    reply's first frame is provisional until the caller speaks again: a clear arriving
+    before then means it was the filler, and the frame after the clear is measured instead.
+    """
+
+    def __init__(self, latencies_ms: List[float]):
+        self.latencies_ms = latencies_ms
+        self.voice_at: Optional[float] = None
+        self.pending_ms: Optional[float] = None
+        self.filler_cut = False
+
+    def agent_audio(self, voice_at: Optional[float], agent_at: Optional[float], now: float) -> None:
+        if voice_at is not None and (agent_at is None or agent_at < voice_at):
+            # First agent audio since the caller last spoke
+            self.settle()
+            self.voice_at, self.pending_ms, self.filler_cut = voice_at, (now - voice_at) * 1000, False
+        elif self.filler_cut:
+            self.pending_ms, self.filler_cut = (now - self.voice_at) * 1000, False
+
+    def cleared(self, voice_at: Optional[float]) -> None:
+        # A clear after the caller spoke again is a barge-in and leaves the reply's latency alone
+        if self.pending_ms is not None and voice_at == self.voice_at:
+            self.pending_ms, self.filler_cut = None, True
+
+    def settle(self) -> None:
+        if self.pending_ms is not None:
+            self.latencies_ms.append(self.pending_ms)
+            self.pending_ms = None
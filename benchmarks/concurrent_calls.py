@@ -0,0 +1,153 @@
+"""
+Shows that concurrent calls each get their own FormAgent and progress independently.
+
+Starts the mock OpenAI and Jotform services (mocks/server.py) in-process and registers
+the FormAgent exactly as main.py does. It then drives N simulated calls at once through
+get_chatgpt_response, each with its own agent keyed by a synthetic stream SID, and
+reports:
+- turn latency and throughput: with an agent per call, latency stays at what one call
+  sees (measured first, with the same turns one at a time) and throughput grows with N;
+  behind one agent, turns queue and latency grows
+- leaks: utterances from another caller found in an agent's conversation context
+- agents left in the runtime after every call has closed its own
+
+It exits non-zero if any call leaked, any agent was left behind, or the mean turn
+latency exceeded the one-call baseline by more than --max-slowdown.
+
+--shared sends every call to one agent, as the old "default" key did, for comparison;
+it is expected to fail the checks.
+
+    python benchmarks/concurrent_calls.py --calls 10 --turns 4
+    python benchmarks/concurrent_calls.py --calls 10 --turns 4 --shared
+"""
+import argparse
+import asyncio
+import os
+import re
+import socket
+import sys
+import time
+import uuid
+from typing import List
+
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+PORT = free_port()
+# main.py reads its configuration at import time
+os.environ.update({
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{PORT}/openai/v1",
+    "JOTFORM_BASE_URL": f"http://127.0.0.1:{PORT}/jotform/",
+    "OPENAI_API_KEY": "mock",
+    "JOTFORM_API_KEY": "mock",
+    "DEEPGRAM_API_KEY": "mock",
+    "TTS_CACHE_ENABLED": "false",
+})
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import main  # noqa: E402
+from autogen_core import AgentId  # noqa: E402
+from form_agent import FormAgent  # noqa: E402
+from mocks.scenario import load_scenario  # noqa: E402
+from mocks.server import create_app  # noqa: E402
+
+CALLER = re.compile(r"caller (\d+),")
+
+
+async def call(index: int, turns: int, shared: bool, latencies: List[float]) -> AgentId:
+    if shared:
+        agent_id = AgentId("assistant", "shared")
+    else:
+        agent_id = await main.open_call_agent(f"MZ{uuid.uuid4().hex}")
+    for turn in range(turns):
+        started = time.perf_counter()
+        await main.get_chatgpt_response(agent_id, f"This is caller {index}, turn {turn}.")
+        latencies.append(time.perf_counter() - started)
+    return agent_id
+
+
+async def leaked_utterances(agent_id: AgentId, index: int) -> int:
+    agent = await main.runtime.try_get_underlying_agent_instance(agent_id, FormAgent)
+    messages = await agent.model_context.get_messages()
+    callers = [int(n) for m in messages if isinstance(m.content, str) for n in CALLER.findall(m.content)]
+    return sum(caller != index for caller in callers)
+
+
+async def run(args):
+    scenario = load_scenario(args.scenario)
+    scenario["seed"] = args.seed
+    server = uvicorn.Server(uvicorn.Config(create_app(scenario), host="127.0.0.1", port=PORT, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    await main.register_form_agent()
+    main.runtime.start()
+    try:
+        agents_before = len(main.instantiated_agents())
+        baseline: List[float] = []
+        baseline_id = await call(-1, args.calls * args.turns, False, baseline)
+        await main.close_call_agent(baseline_id)
+
+        latencies: List[float] = []
+        started = time.perf_counter()
+        agent_ids = await asyncio.gather(*(call(i, args.turns, args.shared, latencies) for i in range(args.calls)))
+        wall = time.perf_counter() - started
+
+        leaks = [await leaked_utterances(agent_id, i) for i, agent_id in enumerate(agent_ids)]
+        for agent_id in set(agent_ids):
+            await main.close_call_agent(agent_id)
+        agents_left = len(main.instantiated_agents()) - agents_before
+
+        mean_ms = sum(latencies) / len(latencies) * 1000
+        baseline_ms = sum(baseline) / len(baseline) * 1000
+        slowdown = mean_ms / baseline_ms
+        leaky_calls = sum(1 for n in leaks if n)
+        mode = "one shared agent" if args.shared else "one agent per call"
+        print(f"{args.calls} calls × {args.turns} turns, {mode}")
+        print(f"  wall time            {wall:6.2f} s")
+        print(f"  mean turn latency    {mean_ms:6.0f} ms  ({slowdown:.2f}× the one-call baseline of {baseline_ms:.0f} ms)")
+        print(f"  turns per second     {len(latencies) / wall:6.2f}")
+        print(f"  calls with leaks     {leaky_calls:6d}  ({sum(leaks)} foreign utterances in agent contexts)")
+        print(f"  agents left          {agents_left:6d}")
+
+        failures = []
+        if leaky_calls:
+            failures.append(f"{leaky_calls} calls saw another caller's utterances")
+        if agents_left:
+            failures.append(f"{agents_left} agents left in the runtime")
+        if slowdown > args.max_slowdown:
+            failures.append(f"turn latency grew {slowdown:.2f}× with {args.calls} calls (limit {args.max_slowdown}×)")
+        return failures
+    finally:
+        await main.runtime.stop_when_idle()
+        await main.close_http_client()
+        server.should_exit = True
+        await serving
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--shared", action="store_true", help="Send every call to one agent")
+    parser.add_argument("--scenario", help="JSON file overriding mocks/scenario.py defaults")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Fail if mean turn latency exceeds the one-call baseline by this factor")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    failures = asyncio.run(run(parse_args()))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
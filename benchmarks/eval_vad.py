@@ -0,0 +1,86 @@
+"""
+Measures what the VAD gate would send for recorded caller audio, and optionally how much
+it changes the transcript.
+
+Input is raw 8 kHz μ-law (the payload bytes Twilio sends, concatenated). With --deepgram,
+both the full and the gated audio are transcribed with Deepgram's prerecorded API
+(DEEPGRAM_API_KEY, bills credits) and the word error rate of gated vs full is reported.
+
+    python benchmarks/eval_vad.py calls/*.ulaw
+    python benchmarks/eval_vad.py --deepgram --threshold -40 calls/*.ulaw
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES  # noqa: E402
+from http_client import get_http_client, close_http_client  # noqa: E402
+from vad import VAD_HANGOVER_MS, VAD_PREROLL_MS, VAD_THRESHOLD_DBFS, VoiceActivityGate  # noqa: E402
+
+LISTEN_URL = "https://api.deepgram.com/v1/listen?encoding=mulaw&sample_rate=8000&model=nova-3&smart_format=true"
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / len(ref) if ref else float(bool(hyp))
+
+
+async def transcribe(audio: bytes) -> str:
+    response = await get_http_client().post(
+        LISTEN_URL,
+        headers={"Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY')}", "Content-Type": "audio/mulaw"},
+        content=audio,
+    )
+    response.raise_for_status()
+    return response.json()["results"]["channels"][0]["alternatives"][0]["transcript"]
+
+
+async def evaluate(path: str, args) -> None:
+    with open(path, "rb") as f:
+        audio = f.read()
+    frames = [audio[i:i + MULAW_FRAME_BYTES] for i in range(0, len(audio), MULAW_FRAME_BYTES)]
+
+    gate = VoiceActivityGate(args.threshold, args.preroll, args.hangover)
+    gated = []
+    for i in range(0, len(frames), args.chunk_frames):
+        gated.extend(gate.process(frames[i:i + args.chunk_frames]))
+    stats = gate.stats()
+    line = (
+        f"{os.path.basename(path)}: {len(frames) * 20 / 1000:.1f}s in, {len(gated) * 20 / 1000:.1f}s sent "
+        f"({stats['sent_ratio']:.0%}), {stats['speech_segments']} speech segments"
+    )
+
+    if args.deepgram:
+        full_text, gated_text = await asyncio.gather(transcribe(audio), transcribe(b"".join(gated)))
+        line += f", WER gated vs full {word_error_rate(full_text, gated_text):.1%}"
+    print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--threshold", type=float, default=VAD_THRESHOLD_DBFS)
+    parser.add_argument("--preroll", type=int, default=VAD_PREROLL_MS)
+    parser.add_argument("--hangover", type=int, default=VAD_HANGOVER_MS)
+    parser.add_argument("--chunk-frames", type=int, default=5, help="Frames per coalesced STT chunk")
+    parser.add_argument("--deepgram", action="store_true", help="Compare transcripts via Deepgram")
+    args = parser.parse_args()
+
+    try:
+        for path in args.recordings:
+            await evaluate(path, args)
+    finally:
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
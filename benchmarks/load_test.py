@@ -0,0 +1,241 @@
+"""
+Ramps concurrent synthetic Twilio calls against /twilio until a latency SLO breaks.
+
+Run the app against the local stand-ins (python -m mocks.server, see README) and point
+this at it. Every call streams 20 ms media frames in real time and echoes marks as Twilio
+would. Callers use synthetic speech bursts and wait for each reply to finish before
+speaking again. With --audio they instead loop recorded caller audio: raw 8 kHz μ-law,
+or a .twcap capture.
+
+Concurrency starts at --start and grows by --step every --step-s seconds. Each step
+reports the following, and the ramp stops at the first step whose p95 exceeds --slo-ms:
+- p50/p95/p99 from the end of caller speech to the first media frame of the agent's reply
+  (the filler the app plays while a reply is slow doesn't count).
+- Event-loop lag, as the round trip of a trivial HTTP request to the app.
+- With --server-pid, the server's CPU and RSS.
+
+    python benchmarks/load_test.py --server-pid $(pgrep -f "uvicorn main:app")
+    python benchmarks/load_test.py --start 5 --step 5 --slo-ms 2000 --audio captures/call.twcap
+"""
+import argparse
+import asyncio
+import base64
+import os
+import random
+import sys
+import time
+import uuid
+from typing import List, Optional
+
+import httpx
+import orjson
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES, MULAW_SILENCE  # noqa: E402
+from benchmarks.call_timing import ProcessSampler, ReplyLatency, percentile  # noqa: E402
+from capture import read_capture  # noqa: E402
+from twilio_codec import parse_message  # noqa: E402
+from vad import VAD_THRESHOLD_DBFS, frame_features  # noqa: E402
+
+FRAME_S = 0.02
+
+
+def load_audio(path: str) -> List[bytes]:
+    """Caller frames from a raw μ-law file or a Twilio capture."""
+    if path.endswith(".twcap"):
+        audio = b"".join(
+            media.audio for _, message in read_capture(path)
+            for event, media, _ in [parse_message(message)] if event == "media"
+        )
+    else:
+        with open(path, "rb") as f:
+            audio = f.read()
+    return [audio[i:i + MULAW_FRAME_BYTES] for i in range(0, len(audio) - MULAW_FRAME_BYTES + 1, MULAW_FRAME_BYTES)]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.probe_ms: List[float] = []
+        self.calls_started = 0
+        self.calls_failed = 0
+
+
+class SyntheticCall:
+    """One simulated caller on its own websocket; reconnects as a new call if hung up on."""
+
+    def __init__(self, url: str, stats: Stats, frames: Optional[List[bytes]], rng: random.Random):
+        self.url = url
+        self.stats = stats
+        self.frames = frames
+        self.rng = rng
+        self.noise = [bytes(rng.getrandbits(8) for _ in range(MULAW_FRAME_BYTES)) for _ in range(8)]
+        if frames:
+            self.speech = frame_features(frames)[0] > VAD_THRESHOLD_DBFS
+
+    async def run(self):
+        while True:
+            try:
+                await self._call()
+            except (OSError, websockets.WebSocketException):
+                self.stats.calls_failed += 1
+                await asyncio.sleep(1)
+
+    async def _call(self):
+        loop = asyncio.get_running_loop()
+        stream_sid = f"MZ{uuid.uuid4().hex}"
+        state = {"last_voice_at": None, "last_agent_at": 0.0, "playout_end": 0.0}
+        pending_marks = {}
+        replies = ReplyLatency(self.stats.latencies_ms)
+
+        async with websockets.connect(self.url, max_size=None) as ws:
+            self.stats.calls_started += 1
+            prefix = '{"event":"media","streamSid":"%s","media":{"track":"inbound","chunk":"%d","timestamp":"%d","payload":"'
+
+            async def send_echo(message: str):
+                try:
+                    await ws.send(message)
+                except websockets.ConnectionClosed:
+                    pass
+
+            def echo_mark(name: str):
+                pending_marks.pop(name, None)
+                echo = {"event": "mark", "streamSid": stream_sid, "mark": {"name": name}}
+                loop.create_task(send_echo(orjson.dumps(echo).decode()))
+
+            async def receiver():
+                async for raw in ws:
+                    data = orjson.loads(raw)
+                    event = data.get("event")
+                    now = loop.time()
+                    if event == "media":
+                        replies.agent_audio(state["last_voice_at"], state["last_agent_at"], now)
+                        state["last_agent_at"] = now
+                        state["playout_end"] = max(state["playout_end"], now) + FRAME_S
+                    elif event == "mark":
+                        name = data["mark"]["name"]
+                        pending_marks[name] = loop.call_at(max(state["playout_end"], now), echo_mark, name)
+                    elif event == "clear":
+                        replies.cleared(state["last_voice_at"])
+                        state["playout_end"] = now
+                        for name, handle in list(pending_marks.items()):
+                            handle.cancel()
+                            echo_mark(name)
+
+            def agent_done(now: float) -> bool:
+                return not pending_marks and now > state["playout_end"] + 0.3 and now > state["last_agent_at"] + 0.3
+
+            await ws.send(orjson.dumps({"event": "start", "streamSid": stream_sid,
+                                        "start": {"streamSid": stream_sid, "callSid": f"CA{uuid.uuid4().hex}"}}).decode())
+            receiving = asyncio.create_task(receiver())
+            try:
+                chunk = 0
+                started = loop.time()
+                phase, phase_until = "pause", started + 1.0
+                while not receiving.done():
+                    now = loop.time()
+                    if self.frames:
+                        frame = self.frames[chunk % len(self.frames)]
+                        voiced = self.speech[chunk % len(self.frames)]
+                    else:
+                        # pause → speak 1-2 s → wait for the reply to finish playing (8 s at most)
+                        if phase == "pause" and now >= phase_until:
+                            phase, phase_until = "speak", now + self.rng.uniform(1.0, 2.0)
+                        elif phase == "speak" and now >= phase_until:
+                            phase, phase_until = "wait", now + 8.0
+                        elif phase == "wait" and (now >= phase_until or (state["last_agent_at"] > state["last_voice_at"] and agent_done(now))):
+                            phase, phase_until = "pause", now + self.rng.uniform(0.5, 1.5)
+                        voiced = phase == "speak"
+                        frame = self.noise[chunk % len(self.noise)] if voiced else MULAW_SILENCE * MULAW_FRAME_BYTES
+                    if voiced:
+                        state["last_voice_at"] = now
+
+                    chunk += 1
+                    payload = base64.b64encode(frame).decode("ascii")
+                    await ws.send(prefix % (stream_sid, chunk, (chunk - 1) * 20) + payload + '"}}')
+                    # Real-time pacing against the call's own clock, so lag doesn't accumulate
+                    await asyncio.sleep(max(0.0, started + chunk * FRAME_S - loop.time()))
+            except websockets.ConnectionClosedOK:
+                pass  # the agent hung up (e.g. after "goodbye"); the next call starts
+            finally:
+                receiving.cancel()
+                await asyncio.gather(receiving, return_exceptions=True)
+                replies.settle()
+
+
+async def probe_loop(base_url: str, stats: Stats):
+    """Round trip of a trivial request: mostly time spent waiting for the app's event loop."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+        while True:
+            started = time.perf_counter()
+            try:
+                await client.get("/openapi.json")
+                stats.probe_ms.append((time.perf_counter() - started) * 1000)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:5000/twilio")
+    parser.add_argument("--start", type=int, default=1, help="Concurrent calls in the first step")
+    parser.add_argument("--step", type=int, default=2, help="Calls added per step")
+    parser.add_argument("--step-s", type=float, default=30.0, help="Seconds per step")
+    parser.add_argument("--max-calls", type=int, default=200)
+    parser.add_argument("--slo-ms", type=float, default=2500.0, help="p95 end of speech → first reply audio")
+    parser.add_argument("--audio", help="Raw 8 kHz μ-law file or .twcap capture to loop as caller audio")
+    parser.add_argument("--server-pid", type=int, help="Sample this process's CPU and RSS")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frames = load_audio(args.audio) if args.audio else None
+    rng = random.Random(args.seed)
+    stats = Stats()
+    sampler = ProcessSampler(args.server_pid) if args.server_pid else None
+    http_url = args.url.replace("ws", "http", 1).rsplit("/", 1)[0]
+    tasks = [asyncio.create_task(probe_loop(http_url, stats))]
+
+    print(f"{'calls':>5} {'replies':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'lag p95':>7} {'cpu %':>6} {'rss MB':>7} {'failed':>6}")
+    knee = None
+    last_ok = None
+    try:
+        concurrency = args.start
+        while concurrency <= args.max_calls:
+            while len(tasks) - 1 < concurrency:
+                call = SyntheticCall(args.url, stats, frames, random.Random(rng.random()))
+                tasks.append(asyncio.create_task(call.run()))
+            stats.latencies_ms.clear()
+            stats.probe_ms.clear()
+            failed_before = stats.calls_failed
+            if sampler:
+                sampler.sample()
+            await asyncio.sleep(args.step_s)
+
+            latencies = list(stats.latencies_ms)
+            cpu, rss = sampler.sample() if sampler else (float("nan"), float("nan"))
+            p95 = percentile(latencies, 0.95)
+            print(f"{concurrency:5d} {len(latencies):7d} {percentile(latencies, 0.5):7.0f} {p95:7.0f} "
+                  f"{percentile(latencies, 0.99):7.0f} {percentile(stats.probe_ms, 0.95):7.1f} "
+                  f"{cpu:6.1f} {rss:7.1f} {stats.calls_failed - failed_before:6d}")
+            if latencies and p95 > args.slo_ms:
+                knee = concurrency
+                break
+            last_ok = concurrency
+            concurrency += args.step
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if knee is None:
+        print(f"SLO (p95 ≤ {args.slo_ms:.0f} ms) held up to {last_ok} concurrent calls")
+    else:
+        passing = f"last passing step: {last_ok} calls" if last_ok else "no step passed"
+        print(f"SLO (p95 ≤ {args.slo_ms:.0f} ms) breached at {knee} concurrent calls; {passing}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Replays Twilio captures (CAPTURE_ENABLED=true, see capture.py) against a running app.
+
+Messages are sent at their recorded pace divided by --speed. Outbound audio is "played"
+at the same pace and marks are echoed back when their audio would have finished (or at
+once on clear), as Twilio does. For each agent reply the script reports the latency from
+the end of the caller's last speech frame to the reply's first media frame, skipping the
+filler the app plays while a reply is slow. With
+--server-pid, it also reports the server's CPU use over the replay.
+
+    python benchmarks/replay_capture.py captures/MZ123.twcap
+    python benchmarks/replay_capture.py captures/*.twcap --speed 2 --server-pid 4242
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import orjson
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.call_timing import ReplyLatency, percentile, process_cpu_s  # noqa: E402
+from capture import read_capture  # noqa: E402
+from twilio_codec import parse_message  # noqa: E402
+from vad import VAD_THRESHOLD_DBFS, frame_features  # noqa: E402
+
+FRAME_S = 0.02
+
+
+async def replay(path: str, url: str, speed: float, linger_s: float) -> dict:
+    messages = list(read_capture(path))
+    loop = asyncio.get_running_loop()
+    latencies = []
+    state = {"last_voice_at": None, "last_agent_at": None, "playout_end": 0.0, "stream_sid": ""}
+    pending_marks = {}
+    replies = ReplyLatency(latencies)
+
+    async with websockets.connect(url, max_size=None) as ws:
+        def echo_mark(name: str):
+            pending_marks.pop(name, None)
+            echo = {"event": "mark", "streamSid": state["stream_sid"], "mark": {"name": name}}
+            loop.create_task(ws.send(orjson.dumps(echo).decode()))
+
+        async def sender():
+            started = loop.time()
+            for offset, message in messages:
+                delay = started + offset / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await ws.send(message)
+                event, media, data = parse_message(message)
+                if event == "start":
+                    state["stream_sid"] = data.get("streamSid") or data["start"].get("streamSid", "")
+                elif event == "media":
+                    dbfs, _ = frame_features([media.audio])
+                    if dbfs[0] > VAD_THRESHOLD_DBFS:
+                        state["last_voice_at"] = loop.time()
+
+        async def receiver():
+            async for raw in ws:
+                data = orjson.loads(raw)
+                event = data.get("event")
+                now = loop.time()
+                if event == "media":
+                    replies.agent_audio(state["last_voice_at"], state["last_agent_at"], now)
+                    state["last_agent_at"] = now
+                    state["playout_end"] = max(state["playout_end"], now) + FRAME_S / speed
+                elif event == "mark":
+                    name = data["mark"]["name"]
+                    pending_marks[name] = loop.call_at(max(state["playout_end"], now), echo_mark, name)
+                elif event == "clear":
+                    replies.cleared(state["last_voice_at"])
+                    state["playout_end"] = now
+                    for name, handle in list(pending_marks.items()):
+                        handle.cancel()
+                        echo_mark(name)
+
+        receiving = asyncio.create_task(receiver())
+        await sender()
+        # The app hangs up on "goodbye"; otherwise give trailing replies a moment
+        try:
+            await asyncio.wait_for(asyncio.shield(receiving), linger_s)
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            pass
+        receiving.cancel()
+        await asyncio.gather(receiving, return_exceptions=True)
+    replies.settle()
+
+    return {
+        "capture": os.path.basename(path),
+        "messages": len(messages),
+        "duration_s": round(messages[-1][0] if messages else 0.0, 1),
+        "replies": len(latencies),
+        "latencies_ms": latencies,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captures", nargs="+")
+    parser.add_argument("--url", default="ws://localhost:5000/twilio")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--linger", type=float, default=5.0, help="Seconds to wait for replies after the capture ends")
+    parser.add_argument("--server-pid", type=int, help="Report this process's CPU use over the replay")
+    args = parser.parse_args()
+
+    cpu_started = process_cpu_s(args.server_pid) if args.server_pid else None
+    wall_started = time.perf_counter()
+    results = await asyncio.gather(*(replay(path, args.url, args.speed, args.linger) for path in args.captures))
+    wall = time.perf_counter() - wall_started
+
+    for result in results:
+        latencies = result["latencies_ms"]
+        summary = f"p50 {statistics.median(latencies):.0f} ms, max {max(latencies):.0f} ms" if latencies else "no replies"
+        print(f"{result['capture']}: {result['messages']} messages over {result['duration_s']} s, "
+              f"{result['replies']} replies ({summary})")
+
+    latencies = [ms for result in results for ms in result["latencies_ms"]]
+    if latencies:
+        print(f"end of speech → first reply audio over {len(latencies)} replies: "
+              f"p50 {percentile(latencies, 0.5):.0f} ms, p95 {percentile(latencies, 0.95):.0f} ms")
+    if cpu_started is not None:
+        cpu = process_cpu_s(args.server_pid) - cpu_started
+        print(f"server CPU: {cpu:.2f} s over {wall:.1f} s wall ({cpu / wall * 100:.1f}% of a core)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
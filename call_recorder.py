@@ -0,0 +1,190 @@
+import os
+import queue
+import struct
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_codec import MULAW_SILENCE, SAMPLE_RATE
+from structured_log import get_logger
+
+log = get_logger("call_recorder")
+
+# Optional QA recordings: caller on the left channel, agent on the right, stored as 8 kHz
+# μ-law stereo WAV (the wire format, so nothing is transcoded and files stay half the size
+# of 16-bit PCM). Audio is interleaved into preallocated NumPy blocks on the event loop and
+# written to disk by a single background thread shared by all calls.
+RECORDING_ENABLED = os.getenv("RECORDING_ENABLED", "false").lower() == "true"
+RECORDING_DIR = os.getenv("RECORDING_DIR", "recordings")
+RECORDING_BLOCK_S = float(os.getenv("RECORDING_BLOCK_S", "5"))
+
+_SILENCE = MULAW_SILENCE[0]
+_WAVE_FORMAT_MULAW = 7
+_CHANNELS = 2
+_HEADER_BYTES = 58  # RIFF + 18-byte fmt (required for non-PCM) + fact + data headers
+
+
+def wav_header(frames: int) -> bytes:
+    data_bytes = frames * _CHANNELS
+    return b"".join([
+        b"RIFF", struct.pack("<I", _HEADER_BYTES - 8 + data_bytes), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHHH", 18, _WAVE_FORMAT_MULAW, _CHANNELS, SAMPLE_RATE,
+                             SAMPLE_RATE * _CHANNELS, _CHANNELS, 8, 0),
+        b"fact", struct.pack("<II", 4, frames),
+        b"data", struct.pack("<I", data_bytes),
+    ])
+
+
+class _BlockWriter:
+    """Daemon thread that performs every recording's file I/O in submission order."""
+
+    def __init__(self):
+        self.jobs: "queue.Queue" = queue.Queue()
+        threading.Thread(target=self._run, name="call-recorder", daemon=True).start()
+
+    def submit(self, fn, *args) -> None:
+        self.jobs.put((fn, args))
+
+    def _run(self) -> None:
+        while True:
+            fn, args = self.jobs.get()
+            try:
+                fn(*args)
+            except Exception:
+                log.exception("Recording write error")
+            finally:
+                self.jobs.task_done()
+
+
+_writer: Optional[_BlockWriter] = None
+
+
+def get_block_writer() -> _BlockWriter:
+    global _writer
+    if _writer is None:
+        _writer = _BlockWriter()
+    return _writer
+
+
+def drain_recordings() -> None:
+    """Blocks until every submitted block has been written (run it off the event loop)."""
+    if _writer is not None:
+        _writer.jobs.join()
+
+
+class CallRecorder:
+    """
+    Stereo recording of one call.
+
+    The caller's track is the time base: inbound audio arrives continuously at real-time
+    pace. Agent audio is sent faster than real time, but Twilio plays it back to back, so a
+    reply is placed at the caller's current position and the agent cursor runs ahead of it;
+    a `clear` rewinds the agent cursor and erases what Twilio discarded. Blocks the caller
+    has moved past can no longer change and are handed to the writer thread.
+    """
+
+    def __init__(self, path: str, block_s: float = RECORDING_BLOCK_S):
+        self.path = path
+        self.block_samples = max(1, int(block_s * SAMPLE_RATE))
+        self._blocks: Dict[int, np.ndarray] = {}
+        self._free: List[np.ndarray] = []  # written blocks come back here for reuse
+        self._flushed = 0  # index of the next block to hand to the writer
+        self._file = None
+
+        self.caller_pos = 0
+        self.agent_pos = 0
+        self.blocks_allocated = 0
+        self.peak_blocks = 0
+
+        self._writer = get_block_writer()
+        self._writer.submit(self._open)
+
+    # ----- event loop side -----
+    def caller_audio(self, frame: bytes) -> None:
+        self._write(0, self.caller_pos, frame)
+        self.caller_pos += len(frame)
+        while (self._flushed + 1) * self.block_samples <= self.caller_pos:
+            self._flush_block(self.block_samples)
+
+    def agent_audio(self, frame: bytes) -> None:
+        self.agent_pos = max(self.agent_pos, self.caller_pos)
+        self._write(1, self.agent_pos, frame)
+        self.agent_pos += len(frame)
+
+    def agent_cleared(self) -> None:
+        if self.agent_pos > self.caller_pos:
+            self._fill(1, self.caller_pos, self.agent_pos)
+        self.agent_pos = self.caller_pos
+
+    def close(self) -> None:
+        """Queues the remaining audio and the final header; returns without waiting for disk."""
+        end = max(self.caller_pos, self.agent_pos)
+        while self._flushed * self.block_samples < end:
+            self._flush_block(min(self.block_samples, end - self._flushed * self.block_samples))
+        self._writer.submit(self._finish, end)
+
+    def _block(self, index: int) -> np.ndarray:
+        block = self._blocks.get(index)
+        if block is None:
+            if self._free:
+                block = self._free.pop()
+            else:
+                block = np.empty((self.block_samples, _CHANNELS), dtype=np.uint8)
+                self.blocks_allocated += 1
+            block.fill(_SILENCE)
+            self._blocks[index] = block
+            self.peak_blocks = max(self.peak_blocks, len(self._blocks))
+        return block
+
+    def _write(self, channel: int, pos: int, audio: bytes) -> None:
+        samples = np.frombuffer(audio, dtype=np.uint8)
+        while len(samples):
+            index, offset = divmod(pos, self.block_samples)
+            n = min(len(samples), self.block_samples - offset)
+            self._block(index)[offset:offset + n, channel] = samples[:n]
+            samples = samples[n:]
+            pos += n
+
+    def _fill(self, channel: int, start: int, end: int) -> None:
+        while start < end:
+            index, offset = divmod(start, self.block_samples)
+            n = min(end - start, self.block_samples - offset)
+            self._block(index)[offset:offset + n, channel] = _SILENCE
+            start += n
+
+    def _flush_block(self, samples: int) -> None:
+        block = self._block(self._flushed)
+        del self._blocks[self._flushed]
+        self._flushed += 1
+        self._writer.submit(self._write_block, block, samples)
+
+    # ----- writer thread side -----
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(wav_header(0))
+
+    def _write_block(self, block: np.ndarray, samples: int) -> None:
+        try:
+            if self._file is not None:
+                self._file.write(memoryview(block[:samples].reshape(-1)))
+        finally:
+            self._free.append(block)
+
+    def _finish(self, frames: int) -> None:
+        if self._file is None:
+            return
+        self._file.seek(0)
+        self._file.write(wav_header(frames))
+        self._file.close()
+        self._file = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "path": self.path,
+            "duration_s": round(max(self.caller_pos, self.agent_pos) / SAMPLE_RATE, 1),
+            "blocks_allocated": self.blocks_allocated,
+            "peak_blocks": self.peak_blocks,
+            "buffer_bytes": self.blocks_allocated * self.block_samples * _CHANNELS,
+        }
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from autogen_core import CancellationToken
+
+from metrics import TurnTimeline
+
+MULAW_BYTES_PER_MS = 8  # 8 kHz, 1 byte per sample
+# Extra wait for a mark echo beyond the audio's own duration before giving up on it
+PLAYBACK_MARK_GRACE_S = float(os.getenv("PLAYBACK_MARK_GRACE_S", "1.5"))
+
+
+class ReplyTurn:
+    """
+    One reply's latency timeline, trace span and filler. The reply task owns it and hands
+    it down explicitly, so a cancelled reply that is still unwinding can't touch the next turn.
+    """
+
+    def __init__(self, speech_final_at: float, span):
+        self.started_at = asyncio.get_running_loop().time()
+        self.timeline = TurnTimeline(speech_final_at)
+        self.span = span
+        # Whether the reply's first frame is still to come, and the filler covering the wait
+        self.awaiting_first_audio = True
+        self.filler_task: Optional[asyncio.Task] = None
+        self.filler_frames = 0
+
+    def mark(self, milestone: str) -> None:
+        """Timestamps a milestone; each keeps its first occurrence."""
+        if milestone in self.timeline.marks:
+            return
+        self.timeline.mark(milestone)
+        self.span.add_event(milestone)
+
+
+class CallSession:
+    """
+    Per-call state shared by the Twilio receiver, the Deepgram STT loop and the reply
+    pipeline (LLM + TTS). Tracks what the agent is currently saying so that caller speech
+    can interrupt it.
+
+    Outbound audio is followed by Twilio ``mark`` messages; Twilio echoes each one back
+    once everything sent before it has been played (or cleared), which bounds the
+    playback position exactly instead of guessing from wall-clock time.
+    """
+
+    def __init__(self, twilio_ws, streamsid: Optional[str] = None):
+        self.twilio_ws = twilio_ws
+        self.streamsid = streamsid
+        self.started = asyncio.Event()
+        self.serializer = None
+
+        self.reply_task: Optional[asyncio.Task] = None
+        self.cancellation_token: Optional[CancellationToken] = None
+        # The call's own FormAgent (keyed by stream SID), created on the start event
+        self.agent_id = None
+
+        # Playback of the current reply, estimated from what has been sent to Twilio
+        self.reply_text = ""
+        self.playback_started_at: Optional[float] = None
+        self.bytes_sent = 0
+
+        # Outstanding marks: name -> (playback generation, bytes_sent when it was sent)
+        self._marks: Dict[str, Tuple[int, int]] = {}
+        self._mark_seq = 0
+        self._playback_generation = 0
+        self.bytes_played = 0  # confirmed by echoed marks
+        self.playback_idle = asyncio.Event()
+        self.playback_idle.set()
+
+        self.interruptions: List[Dict[str, Any]] = []
+
+        # Tracing: the call's root span and the context its child spans start from
+        self.call_span = None
+        self.trace_context = None
+
+        # Pipeline stages attach themselves here so their counters outlive the stage
+        self.stt_coalescer = None
+        self.vad_gate = None
+        self.speculator = None
+        self.recorder = None
+
+    def start_reply(self, coro) -> asyncio.Task:
+        """Runs a reply coroutine as the call's single in-flight reply."""
+        self.cancellation_token = CancellationToken()
+        self.reply_task = asyncio.create_task(coro)
+        return self.reply_task
+
+    def start_playback(self, text: str) -> None:
+        self.reply_text = text
+        self._reset_playback()
+
+    def _reset_playback(self) -> None:
+        self._playback_generation += 1
+        self.playback_started_at = None
+        self.bytes_sent = 0
+        self.bytes_played = 0
+
+    def on_audio_sent(self, num_bytes: int) -> None:
+        if self.playback_started_at is None:
+            self.playback_started_at = time.monotonic()
+        self.bytes_sent += num_bytes
+
+    def mark_sent(self) -> str:
+        """Registers a mark at the current playback position and returns its name."""
+        self._mark_seq += 1
+        name = f"m{self._mark_seq}"
+        self._marks[name] = (self._playback_generation, self.bytes_sent)
+        self.playback_idle.clear()
+        return name
+
+    def on_mark(self, name: str) -> None:
+        """Twilio echoed a mark: everything sent before it has been played."""
+        mark = self._marks.pop(name, None)
+        if mark is None:
+            return
+        generation, position = mark
+        if generation == self._playback_generation:
+            self.bytes_played = max(self.bytes_played, position)
+        if not self._marks:
+            self.playback_idle.set()
+
+    async def wait_played(self) -> bool:
+        """
+        Waits until Twilio has played every marked frame. Falls back to the audio's
+        duration plus a grace period if an echo never arrives; returns False then.
+        """
+        timeout = max(self.sent_ms() - self.heard_ms(), 0) / 1000 + PLAYBACK_MARK_GRACE_S
+        try:
+            await asyncio.wait_for(self.playback_idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def sent_ms(self) -> float:
+        return self.bytes_sent / MULAW_BYTES_PER_MS
+
+    def heard_ms(self) -> float:
+        """
+        Audio Twilio has played so far. Between marks it plays in real time from the first
+        frame; echoed marks are a floor and outstanding ones a ceiling on that estimate.
+        """
+        if self.playback_started_at is None:
+            return 0.0
+        elapsed_ms = (time.monotonic() - self.playback_started_at) * 1000
+        ceiling = min(
+            (position for generation, position in self._marks.values() if generation == self._playback_generation),
+            default=self.bytes_sent,
+        )
+        return max(min(elapsed_ms, ceiling / MULAW_BYTES_PER_MS), self.bytes_played / MULAW_BYTES_PER_MS)
+
+    @property
+    def reply_in_flight(self) -> bool:
+        return self.reply_task is not None and not self.reply_task.done()
+
+    @property
+    def agent_speaking(self) -> bool:
+        if self.reply_in_flight:
+            return True
+        if self._marks:
+            return True
+        # Audio sent without a mark yet (e.g. mid-utterance): fall back to the estimate
+        return self.playback_started_at is not None and self.heard_ms() < self.sent_ms()
+
+    def interrupt(self) -> Dict[str, Any]:
+        """Cancels in-flight LLM/TTS work and records how much of the reply the caller heard."""
+        if self.cancellation_token is not None:
+            self.cancellation_token.cancel()
+        if self.reply_in_flight:
+            self.reply_task.cancel()
+
+        record = {
+            "reply_text": self.reply_text,
+            "sent_ms": round(self.sent_ms()),
+            "heard_ms": round(self.heard_ms()),
+        }
+        self.interruptions.append(record)
+
+        self.reply_text = ""
+        self._reset_playback()
+        # The caller is sent a clear, which drops the buffer and echoes every pending mark
+        self._marks.clear()
+        self.playback_idle.set()
+        return record
@@ -0,0 +1,113 @@
+import binascii
+import os
+import struct
+import time
+import uuid
+from typing import Iterator, Optional, Tuple
+
+import orjson
+
+from call_recorder import get_block_writer
+from twilio_codec import InboundMedia
+
+# Capture mode writes every inbound Twilio message to CAPTURE_DIR/<streamSid>.twcap so a
+# call can be replayed without a phone (benchmarks/replay_capture.py). Media is stored as
+# raw μ-law plus its chunk/timestamp rather than base64 JSON, under half the size;
+# other events are kept verbatim. Writes go through the recorder's background thread.
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true"
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+CAPTURE_FLUSH_BYTES = int(os.getenv("CAPTURE_FLUSH_BYTES", "65536"))
+
+MAGIC = b"TWCAP1\n"
+# Record: arrival offset (µs since the websocket opened), kind, body length
+_RECORD = struct.Struct("<QBI")
+_MEDIA = struct.Struct("<II")  # chunk, timestamp
+KIND_EVENT = 0
+KIND_MEDIA = 1
+
+
+class TwilioCapture:
+    """Buffers one call's inbound messages and hands them to the writer thread in batches."""
+
+    def __init__(self, directory: str = CAPTURE_DIR):
+        self.directory = directory
+        self.path: Optional[str] = None
+        self.messages = 0
+        self.bytes_written = 0
+        self._started = time.perf_counter()
+        self._buffer = bytearray(MAGIC)
+        self._file = None
+        self._writer = get_block_writer()
+
+    def set_stream_sid(self, stream_sid: str) -> None:
+        if self.path is None:
+            self.path = os.path.join(self.directory, f"{stream_sid}.twcap")
+
+    def record(self, raw: str, media: Optional[InboundMedia] = None) -> None:
+        offset_us = int((time.perf_counter() - self._started) * 1e6)
+        if media is not None and media.chunk is not None and media.timestamp is not None:
+            self._buffer += _RECORD.pack(offset_us, KIND_MEDIA, _MEDIA.size + len(media.audio))
+            self._buffer += _MEDIA.pack(media.chunk, media.timestamp)
+            self._buffer += media.audio
+        else:
+            body = raw.encode("utf-8")
+            self._buffer += _RECORD.pack(offset_us, KIND_EVENT, len(body))
+            self._buffer += body
+        self.messages += 1
+        if len(self._buffer) >= CAPTURE_FLUSH_BYTES and self.path is not None:
+            self._flush()
+
+    def close(self) -> None:
+        if self.path is None:
+            self.path = os.path.join(self.directory, f"{uuid.uuid4().hex}.twcap")
+        self._flush()
+        self._writer.submit(self._close_file)
+
+    def _flush(self) -> None:
+        data, self._buffer = bytes(self._buffer), bytearray()
+        self.bytes_written += len(data)
+        self._writer.submit(self._write, data)
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.path, "wb")
+        self._file.write(data)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, str]]:
+    """Yields ``(offset_s, message)`` with media rebuilt in Twilio's JSON layout."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a Twilio capture")
+
+    stream_sid = ""
+    pos = len(MAGIC)
+    while pos < len(data):
+        offset_us, kind, length = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        body = data[pos:pos + length]
+        pos += length
+
+        if kind == KIND_MEDIA:
+            chunk, timestamp = _MEDIA.unpack_from(body)
+            payload = binascii.b2a_base64(body[_MEDIA.size:], newline=False).decode("ascii")
+            message = orjson.dumps({
+                "event": "media",
+                # Twilio's sequenceNumber isn't captured; start is 1, so media is chunk + 1
+                "sequenceNumber": str(chunk + 1),
+                "media": {"track": "inbound", "chunk": str(chunk), "timestamp": str(timestamp), "payload": payload},
+                "streamSid": stream_sid,
+            }).decode()
+        else:
+            message = body.decode("utf-8")
+            event = orjson.loads(message)
+            if event.get("event") == "start":
+                stream_sid = event.get("streamSid") or event["start"].get("streamSid", "")
+        yield offset_us / 1e6, message
@@ -1,4 +1,8 @@
-from typing import Any, Dict, Optional, Type
+import asyncio
+import copy
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Type
 
 from autogen_core import (
     DefaultTopicId,
@@ -10,17 +14,28 @@ from autogen_core import (
 )
 from autogen_core.models import ChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage  # or your own message class
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import (  # or your own message class
+    ModelClientStreamingChunkEvent,
+    TextMessage,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+)
 from autogen_core.model_context import BufferedChatCompletionContext
 
 # Optional convenience import – you can supply another client class if you wish.
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from jotform import JotformAPIClient
+from metrics import LLM_CALL_SECONDS, TOOL_CALL_SECONDS
+from tracing import extract_trace_context, tracer
+from structured_log import get_logger
 import os
 from flask import Flask
 
 import sqlite3
 
+log = get_logger("form_agent")
+
 # support_agent_prompt = '''
 # Instructions:
 # You are a friendly and efficient customer support agent who assists users over the phone in filling out the following form: {form_title}. Your primary goal is to guide the caller through each field in the form, collecting accurate information while maintaining a natural, conversational tone.
@@ -145,6 +160,10 @@ You will never ask the next question until you have called the add_question_answ
 To add a question to the answered questions state and move on to the next question, you must call the add_question_answer tool.
 Be sure to call the add_question_answer tool with the answer to the current question before replying to the user.
 Be sure to submit the form using the submit_form tool when the next question is None.
+When you ask a question, use exactly the wording of its Spoken Prompt. When you ask for identity details, use exactly one of the Identity Prompts.
+
+Identity Prompts:
+{identity_prompts}
 
 If identity is not verified, you will use the verify_identity tool to verify the user's identity. Verifying the identity is required before answering any questions or using any tools.
 To verify identity, you must ask the user for their first and last name and birth date, then call the verify_identity tool.
@@ -192,6 +211,75 @@ Current Response from User:
 # {user_response}
 # '''
 # Problem description:  My account lost access to the servers. I need IT to 
+
+@dataclass
+class RollbackTurn:
+    """Asks a FormAgent to undo its most recent turn (e.g. a discarded speculative turn)."""
+
+
+# Fixed phrasings for identity verification; with the Spoken Prompt of each question these
+# are pre-rendered to audio, so replies that use them verbatim play without a TTS round trip
+IDENTITY_PROMPTS = (
+    "To get started, may I have your first and last name?",
+    "Thank you. And what is your date of birth?",
+    "I'm sorry, I couldn't verify your identity. Could you repeat your full name and date of birth?",
+)
+
+
+def spoken_prompt(question: Dict[str, Any]) -> str:
+    """The canonical way the agent asks a Jotform question out loud."""
+    text = question.get("text", "").strip()
+    if text.endswith("?"):
+        return text
+    return f"Can you tell me your {text.lower()}?"
+
+
+def observe_agent_timings(started_at: datetime, messages: Sequence[Any]) -> None:
+    """
+    Splits an agent turn into its model calls and tool executions. Each event is stamped
+    when it is created, so the gap before it is the call that produced it.
+    """
+    previous = started_at
+    after_tools = False
+    for event in messages:
+        if getattr(event, "source", None) == "user":
+            continue
+        seconds = max(0.0, (event.created_at - previous).total_seconds())
+        if isinstance(event, ToolCallRequestEvent):
+            LLM_CALL_SECONDS.observe(seconds, call="tool_selection")
+        elif isinstance(event, ToolCallExecutionEvent):
+            # Tools requested together run concurrently, so they share the batch's duration
+            for tool_result in event.content:
+                TOOL_CALL_SECONDS.observe(seconds, tool=tool_result.name)
+            after_tools = True
+        elif isinstance(event, TextMessage):
+            LLM_CALL_SECONDS.observe(seconds, call="reflection" if after_tools else "reply")
+        else:
+            continue
+        previous = event.created_at
+
+
+def load_form_questions(jotform_client: JotformAPIClient, form_id: str) -> list:
+    """Returns the questions of a Jotform form that the caller has to answer, in form order."""
+    questions = []
+    form_items = jotform_client.get_form_questions(form_id)
+    for qid, question in form_items.items():
+        is_readonly = question.get("readonly", "Yes")
+        if is_readonly != "No":
+            continue
+
+        name = question.get("name", "")
+        if name: name = f"_{name}"
+
+        questions.append(question)
+    return questions
+
+
+# Token queues for turns whose caller wants the reply as it is generated, keyed by the
+# "stream_id" metadata of the TextMessage. The agent puts None once the turn is over.
+reply_streams: Dict[str, asyncio.Queue] = {}
+
+
 class FormAgent(RoutedAgent):
     """
     A RoutedAgent wrapper around autogen_agentchat.agents.AssistantAgent that
@@ -201,6 +289,9 @@ class FormAgent(RoutedAgent):
     ----------
     model_client_kwargs : dict, optional
         Keyword arguments forwarded to `model_client_cls(**model_client_kwargs)`.
+    form_info, questions : optional
+        The form and its questions as loaded by ``load_form_questions``. Every call gets
+        its own agent, so passing these in spares two blocking Jotform requests per call.
     **assistant_kwargs
         Every other keyword is passed unchanged to `AssistantAgent`.
         If you *explicitly* supply your own ``model_client`` inside
@@ -212,8 +303,11 @@ class FormAgent(RoutedAgent):
         *,
         form_id: str = None,
         api_key: str = os.getenv("JOTFORM_API_KEY"),
+        jotform_base_url: str = os.getenv("JOTFORM_BASE_URL", JotformAPIClient.DEFAULT_BASE_URL),
         publish_topic_type: str = None,
         model_client_kwargs: Optional[Dict[str, Any]] = None,
+        form_info: Optional[Dict[str, Any]] = None,
+        questions: Optional[list] = None,
         flask_app: Flask = None,
         **assistant_kwargs: Any,
     ) -> None:
@@ -232,26 +326,25 @@ class FormAgent(RoutedAgent):
 
         self.identity_verified = False
 
+        # Turns run one at a time; the state at the start of the last turn is kept so a
+        # speculative turn can be rolled back
+        self._turn_lock = asyncio.Lock()
+        self._turn_snapshot: Optional[Dict[str, Any]] = None
+        self._closed = False
+        # Set while a speculative turn runs; submit_form flags the turn instead of submitting
+        self._speculating = False
+        self._submit_deferred = False
+
         # Initialize form fields
         self.form_submitted = False
         self.form_id = form_id
 
-        self.jotform_client = JotformAPIClient(api_key)
-        self.form_info = self.jotform_client.get_form(form_id)
+        self.jotform_client = JotformAPIClient(api_key, baseUrl=jotform_base_url)
+        self.form_info = form_info if form_info is not None else self.jotform_client.get_form(form_id)
 
         self.form_title = self.form_info.get("title", "No Title Provided")
 
-        self.questions  = []
-        form_items = self.jotform_client.get_form_questions(form_id)
-        for qid, question in form_items.items():
-            is_readonly = question.get("readonly", "Yes")
-            if is_readonly != "No":
-                continue
-            
-            name = question.get("name", "")
-            if name: name = f"_{name}"
-
-            self.questions.append(question)
+        self.questions = list(questions) if questions is not None else load_form_questions(self.jotform_client, form_id)
 
         self.qa_state = {}
         self.current_question_index = 0
@@ -308,6 +401,42 @@ class FormAgent(RoutedAgent):
         """Forward incoming content to the AssistantAgent and publish reply."""
         # print(f"AgentID: {self.id}")
         # print(f"message: {message.content}")
+        speculative = message.metadata.get("speculative") == "true"
+        stream = reply_streams.get(message.metadata.get("stream_id", ""))
+
+        try:
+            # Continue the caller's trace; waiting for the turn lock is part of the span
+            with tracer.start_as_current_span(
+                "agent.turn",
+                context=extract_trace_context(message.metadata),
+                attributes={"agent.id": str(self.id), "agent.speculative": speculative},
+            ):
+                async with self._turn_lock:
+                    if self._closed:
+                        return None
+                    # Never speculate on the last question: submit_form can't be rolled back (a
+                    # speculative turn that answers the last two at once is caught in submit_form)
+                    if speculative and self.next_question is None:
+                        self._turn_snapshot = None
+                        return None
+
+                    self._turn_snapshot = await self._save_turn_state()
+                    self._speculating, self._submit_deferred = speculative, False
+                    try:
+                        reply = await self._run_turn(message, ctx, speculative, stream)
+                    finally:
+                        self._speculating = False
+                    if self._submit_deferred:
+                        # The turn wanted to submit: undo it so the committed turn does it for real
+                        snapshot, self._turn_snapshot = self._turn_snapshot, None
+                        await self._restore_turn_state(snapshot)
+                        return None
+                    return reply
+        finally:
+            if stream is not None:
+                stream.put_nowait(None)
+
+    async def _run_turn(self, message: TextMessage, ctx: MessageContext, speculative: bool, stream: Optional[asyncio.Queue]) -> Any:
         next_question: str = None
         current_question: str = None
 
@@ -315,13 +444,14 @@ class FormAgent(RoutedAgent):
             return None
 
         if self.next_question:
-            next_question = f"{self.next_question['text']}\nDetails: {self.next_question}"
+            next_question = f"{self.next_question['text']}\nSpoken Prompt: {spoken_prompt(self.next_question)}\nDetails: {self.next_question}"
 
         if self.current_question:
-            current_question = f"{self.current_question['text']}\nDetails: {self.current_question}"
+            current_question = f"{self.current_question['text']}\nSpoken Prompt: {spoken_prompt(self.current_question)}\nDetails: {self.current_question}"
         
         task_message = qa_form_prompt.format(
             identity_verified=self.identity_verified,
+            identity_prompts="\n".join(IDENTITY_PROMPTS),
             qa_state=self.qa_state,
             next_question=next_question,
             current_question=current_question,
@@ -330,22 +460,69 @@ class FormAgent(RoutedAgent):
         # context = await self.model_context.get_messages()
         # print(f"Model Context: {context}")
         
-        result = await self.assistant.run(task=task_message, cancellation_token=ctx.cancellation_token)
+        started_at = datetime.now(timezone.utc)
+        if stream is None:
+            result = await self.assistant.run(task=task_message, cancellation_token=ctx.cancellation_token)
+        else:
+            # Hand tokens of the (reflected) reply to the caller as the model produces them
+            result = None
+            async for event in self.assistant.run_stream(task=task_message, cancellation_token=ctx.cancellation_token):
+                if isinstance(event, ModelClientStreamingChunkEvent):
+                    stream.put_nowait(event.content)
+                elif isinstance(event, TaskResult):
+                    result = event
 
         # Extract the assistant’s last message (the final response)
         # print(f"result: {result}")
         # print(f"task_message: {task_message}")
         # print(f"qa_state: {self.qa_state}")
 
-        if result.messages:
+        if result is not None and result.messages:
+            observe_agent_timings(started_at, result.messages)
             response = result.messages[-1].content  # type: ignore[attr-defined]
             # print(f"{self.name}: {response}")
 
-            await self.publish_message(TextMessage(content=response, source=self.name), self.publish_topic_id)
+            # A speculative reply may still be discarded, so only committed turns are published
+            if not speculative:
+                await self.publish_message(TextMessage(content=response, source=self.name), self.publish_topic_id)
 
             return TextMessage(content=response, source=self.name)
         
         return None
+
+    @message_handler
+    async def handle_rollback(self, message: RollbackTurn, ctx: MessageContext) -> None:
+        """Restores the form and conversation state saved at the start of the last turn."""
+        async with self._turn_lock:
+            if self._turn_snapshot is None:
+                return None
+            snapshot, self._turn_snapshot = self._turn_snapshot, None
+            await self._restore_turn_state(snapshot)
+
+    async def close(self) -> None:
+        """Waits for a turn in progress, then refuses further turns (the call has ended)."""
+        async with self._turn_lock:
+            self._closed = True
+            self._turn_snapshot = None
+        await super().close()
+
+    async def _save_turn_state(self) -> Dict[str, Any]:
+        return {
+            "identity_verified": self.identity_verified,
+            "qa_state": copy.deepcopy(self.qa_state),
+            "current_question_index": self.current_question_index,
+            "current_question": self.current_question,
+            "next_question": self.next_question,
+            "assistant": await self.assistant.save_state(),
+        }
+
+    async def _restore_turn_state(self, snapshot: Dict[str, Any]) -> None:
+        self.identity_verified = snapshot["identity_verified"]
+        self.qa_state = snapshot["qa_state"]
+        self.current_question_index = snapshot["current_question_index"]
+        self.current_question = snapshot["current_question"]
+        self.next_question = snapshot["next_question"]
+        await self.assistant.load_state(snapshot["assistant"])
     
     # def search_name(name: str) -> str:
     #     print(f"Search Name Tool Output: {name}")
@@ -424,7 +601,7 @@ class FormAgent(RoutedAgent):
         # else:
         #     self.next_question = None
 
-        print(f"add_question_answer tool: {qid}, {answer}")
+        log.info("add_question_answer tool: %s, %s", qid, answer, extra={"agent_id": str(self.id)})
 
         return "Answer added successfully."
     
@@ -450,6 +627,11 @@ class FormAgent(RoutedAgent):
         if self.next_question:
             return "There are still questions to answer. Please ask the next question before submitting the form."
 
+        if self._speculating:
+            # A speculative turn may still be discarded, and a submission can't be rolled back
+            self._submit_deferred = True
+            return "The form can't be submitted yet."
+
         submission_data = {}
 
         for qid, answer in self.qa_state.items():
@@ -464,5 +646,5 @@ class FormAgent(RoutedAgent):
         if submission_info.get("submissionID"):
             self.form_submitted = True
 
-        print(f"submit_form tool: {submission_info}")
+        log.info("submit_form tool: %s", submission_info, extra={"agent_id": str(self.id)})
         return "Form submitted successfully."
\ No newline at end of file
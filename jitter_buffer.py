@@ -0,0 +1,120 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from audio_codec import MULAW_FRAME_BYTES, MULAW_SILENCE, SAMPLE_RATE
+
+# Inbound frames are put back in order by Twilio's per-media `chunk` counter, and gaps in
+# `timestamp` are filled with μ-law silence so Deepgram sees audio at its real pace. A frame
+# that hasn't arrived once the buffer holds JITTER_DELAY_MS of later audio is treated as lost;
+# Twilio streams continuously (silence included), so that depth bounds the added delay.
+JITTER_BUFFER_ENABLED = os.getenv("JITTER_BUFFER_ENABLED", "true").lower() == "true"
+JITTER_DELAY_MS = int(os.getenv("JITTER_DELAY_MS", "60"))
+JITTER_MAX_GAP_MS = int(os.getenv("JITTER_MAX_GAP_MS", "1000"))
+
+FRAME_MS = MULAW_FRAME_BYTES * 1000 // SAMPLE_RATE
+BYTES_PER_MS = SAMPLE_RATE // 1000
+
+# Shared by every gap fill, so concealment never allocates
+SILENCE_FRAME = MULAW_SILENCE * MULAW_FRAME_BYTES
+
+
+class JitterBuffer:
+    """Per-call reordering buffer for inbound Twilio media frames."""
+
+    def __init__(self, delay_ms: int = JITTER_DELAY_MS, max_gap_ms: int = JITTER_MAX_GAP_MS):
+        self.depth = max(1, delay_ms // FRAME_MS)
+        self.max_gap_ms = max_gap_ms
+        # Ring of slots indexed by chunk number, allocated once
+        self._slots: List[Optional[Tuple[int, int, bytes]]] = [None] * (self.depth + 1)
+        self._buffered = 0
+        self._next_chunk: Optional[int] = None
+        self._highest_chunk = 0
+        self._next_timestamp = 0
+
+        self.frames_in = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.late = 0
+        self.lost = 0
+        self.concealed_ms = 0
+
+    def push(self, audio: bytes, chunk: Optional[int], timestamp: Optional[int]) -> List[bytes]:
+        """Adds one frame and returns the frames (real or silence) now ready, in order."""
+        self.frames_in += 1
+        if chunk is None:
+            # No ordering information (unexpected message layout): pass it straight through
+            return [audio]
+
+        if self._next_chunk is None:
+            if chunk <= len(self._slots):
+                # Twilio numbers chunks from 1 at 0 ms; the first ones may simply arrive late
+                self._next_chunk = self._highest_chunk = 1
+            else:
+                self._next_chunk = self._highest_chunk = chunk
+                self._next_timestamp = timestamp if timestamp is not None else 0
+
+        if chunk < self._next_chunk:
+            self.late += 1  # already played out or given up on
+            return []
+        if chunk < self._highest_chunk:
+            self.reordered += 1
+        self._highest_chunk = max(self._highest_chunk, chunk)
+
+        ready: List[bytes] = []
+        # A frame further ahead than the ring can hold forces the oldest slots out
+        while chunk - self._next_chunk >= len(self._slots):
+            self._advance(ready)
+
+        index = chunk % len(self._slots)
+        if self._slots[index] is not None:
+            self.duplicates += 1
+            return ready
+        if timestamp is None:
+            timestamp = self._next_timestamp + (chunk - self._next_chunk) * FRAME_MS
+        self._slots[index] = (chunk, timestamp, audio)
+        self._buffered += 1
+
+        while self._slots[self._next_chunk % len(self._slots)] is not None:
+            self._advance(ready)
+        # Stop waiting for a missing frame once enough later audio is queued behind it
+        while self._buffered and self._highest_chunk - self._next_chunk >= self.depth:
+            self._advance(ready)
+        return ready
+
+    def flush(self) -> List[bytes]:
+        """Releases everything still buffered, e.g. when the stream stops."""
+        ready: List[bytes] = []
+        while self._buffered:
+            self._advance(ready)
+        return ready
+
+    def _advance(self, ready: List[bytes]) -> None:
+        index = self._next_chunk % len(self._slots)
+        entry = self._slots[index]
+        self._next_chunk += 1
+        if entry is None:
+            self.lost += 1
+            return
+
+        self._slots[index] = None
+        self._buffered -= 1
+        _, timestamp, audio = entry
+        gap_ms = min(timestamp - self._next_timestamp, self.max_gap_ms)
+        if gap_ms >= FRAME_MS:
+            ready.extend([SILENCE_FRAME] * (gap_ms // FRAME_MS))
+            self.concealed_ms += gap_ms // FRAME_MS * FRAME_MS
+        ready.append(audio)
+        self._next_timestamp = timestamp + len(audio) // BYTES_PER_MS
+
+    def stats(self) -> Dict[str, float]:
+        expected = self.frames_in - self.duplicates - self.late + self.lost
+        return {
+            "delay_ms": self.depth * FRAME_MS,
+            "frames_in": self.frames_in,
+            "reordered": self.reordered,
+            "duplicates": self.duplicates,
+            "late": self.late,
+            "lost": self.lost,
+            "loss_rate": round(self.lost / expected, 4) if expected else 0.0,
+            "concealed_ms": self.concealed_ms,
+        }
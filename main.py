@@ -1,27 +1,73 @@
 import asyncio
-import base64
+import binascii
+import functools
+import hmac
 import json
+import uuid
 import sys
-import websockets
 import ssl
-import requests
 import os
+import time
+from typing import Optional
 from openai import OpenAI
 from dotenv import load_dotenv
-import audioop
 import uvicorn
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from opentelemetry import trace
+
+from http_client import get_http_client, close_http_client
+from call_session import CallSession, ReplyTurn
+from audio_codec import MULAW_FRAME_BYTES, MulawDecoder, MulawFramer
+from stt_pipeline import AudioQueue, FrameCoalescer
+from vad import VAD_ENABLED, VAD_KEEPALIVE_S, VoiceActivityGate
+from stt_pool import DeepgramConnectionPool
+from twilio_codec import MediaSerializer, parse_message
+from jitter_buffer import JITTER_BUFFER_ENABLED, JitterBuffer
+from call_recorder import RECORDING_DIR, RECORDING_ENABLED, CallRecorder, drain_recordings
+from supervision import SupervisorHub
+from capture import CAPTURE_ENABLED, TwilioCapture
+from metrics import ACTIVE_CALLS, monitor_loop_lag, render_metrics
+from tracing import epoch_ns, init_tracing, inject_trace_context, start_call_span, tracer
+from structured_log import bind_call, configure_logging, get_logger
+from speculation import SPECULATIVE_ENABLED, Speculator
+from text_stream import sentences_from_tokens
+from tts_cache import TTS_CACHE_ENABLED, TTSCache
+from prerender import PRERENDER_ENABLED, prerender_form_prompts
+from jotform import JotformAPIClient
 
 
 load_dotenv()
+configure_logging()
+log = get_logger("main")
 
 app = FastAPI()
 
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 JOTFORM_API_KEY = os.getenv("JOTFORM_API_KEY")
-openai = OpenAI(api_key=OPENAI_API_KEY)
+BARGE_IN_ENABLED = os.getenv("BARGE_IN_ENABLED", "true").lower() == "true"
+# "mulaw" forwards Twilio audio to Deepgram untouched; "linear16" decodes it to PCM first
+STT_ENCODING = os.getenv("STT_ENCODING", "linear16")
+# Stream LLM tokens and start TTS per sentence instead of waiting for the whole reply
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+TTS_MAX_PREFETCH = int(os.getenv("TTS_MAX_PREFETCH", "3"))
+TTS_MODEL = os.getenv("TTS_MODEL", "aura-asteria-en")
+FORM_ID = os.getenv("JOTFORM_FORM_ID", "251997111120854")
+FORM_LOAD_ATTEMPTS = int(os.getenv("FORM_LOAD_ATTEMPTS", "4"))
+FAREWELL = "Goodbye! Ending the call now."
+# Short pre-rendered acknowledgement played when a reply is slow to start
+FILLER_ENABLED = os.getenv("FILLER_ENABLED", "true").lower() == "true"
+FILLER_THRESHOLD_MS = int(os.getenv("FILLER_THRESHOLD_MS", "700"))
+FILLER_TEXT = os.getenv("FILLER_TEXT", "Got it, one moment.")
+# Upstream services; point these at `python -m mocks.server` to run fully offline
+DEEPGRAM_BASE_URL = os.getenv("DEEPGRAM_BASE_URL", "https://api.deepgram.com").rstrip("/")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # unset: OpenAI's default
+JOTFORM_BASE_URL = os.getenv("JOTFORM_BASE_URL", JotformAPIClient.DEFAULT_BASE_URL)
+# Shared secret for /supervisor; the route is disabled while it is unset
+SUPERVISOR_TOKEN = os.getenv("SUPERVISOR_TOKEN")
+openai = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
 
 
 
@@ -69,177 +115,755 @@ def load_users_from_csv(csv_path):
             try:
                 month, day, year = map(int, birthdate.split("/"))
             except ValueError:
-                print(f"Invalid date format: {birthdate} — skipping.")
+                log.warning("Invalid date format: %s — skipping.", birthdate)
                 continue
 
             insert_user(first_name, last_name, month, day, year)
 
-    print("✅ Users imported successfully.")
+    log.info("✅ Users imported successfully.")
 
 
 
 # ----- AutoGen ----
 
-from autogen_core import SingleThreadedAgentRuntime, AgentId
+import autogen_core
+from autogen_core import SingleThreadedAgentRuntime, AgentId, CancellationToken
 from autogen_agentchat.messages import TextMessage
-from form_agent import FormAgent
+from form_agent import FormAgent, RollbackTurn, reply_streams, IDENTITY_PROMPTS, load_form_questions, spoken_prompt
 
+tracer_provider = init_tracing()
 runtime = SingleThreadedAgentRuntime()
-
-@app.on_event("startup")
-async def startup_event():
-    # Register the FormAgent on startup
+background_tasks = []
+# The form and its questions, loaded at startup and refreshed by the pre-render job; every
+# new call's FormAgent is built from the current one
+form_definition = {}
+
+async def load_form_prompts() -> list[str]:
+    # The pre-render job's periodic reload also refreshes the definition new calls' agents
+    # get, so the prompts it caches are the questions they actually ask
+    await load_form_definition()
+    questions = form_definition["questions"]
+    return [spoken_prompt(question) for question in questions] + list(IDENTITY_PROMPTS) + [FAREWELL, FILLER_TEXT]
+
+async def load_form_definition():
+    """
+    Loads the form off the event loop, retrying with backoff, and fails startup if Jotform
+    stays unreachable: agents loading it themselves would block the loop on every call.
+    """
+    jotform_client = JotformAPIClient(JOTFORM_API_KEY, baseUrl=JOTFORM_BASE_URL)
+    for attempt in range(1, FORM_LOAD_ATTEMPTS + 1):
+        try:
+            form_info = await asyncio.to_thread(jotform_client.get_form, FORM_ID)
+            questions = await asyncio.to_thread(load_form_questions, jotform_client, FORM_ID)
+            break
+        except Exception:
+            if attempt == FORM_LOAD_ATTEMPTS:
+                raise
+            log.exception("Jotform form load error (attempt %d of %d)", attempt, FORM_LOAD_ATTEMPTS)
+            await asyncio.sleep(2 ** attempt)
+    form_definition.update(form_info=form_info, questions=questions)
+
+async def register_form_agent():
+    # One FormAgent per call, keyed by stream SID; the runtime builds each from this factory
+    await load_form_definition()
     await FormAgent.register(
         runtime,
         type="assistant",
         factory=lambda: FormAgent(
             api_key=os.getenv("JOTFORM_API_KEY"),
-            form_id="251997111120854",
+            jotform_base_url=JOTFORM_BASE_URL,
+            form_id=FORM_ID,
             model_client_kwargs={
                 "model": "gpt-4o",
                 "api_key": os.getenv("OPENAI_API_KEY"),
+                "base_url": OPENAI_BASE_URL,
+                "http_client": get_http_client(),
             },
             reflect_on_tool_use=True,
-            model_client_stream=False,
+            model_client_stream=LLM_STREAMING,
+            **form_definition,
         ),
     )
+
+async def open_call_agent(stream_sid: str) -> AgentId:
+    """Creates the call's FormAgent up front, so its first turn doesn't pay for it."""
+    return await runtime.get(AgentId("assistant", stream_sid), lazy=False)
+
+# autogen has no public API for dropping an agent instance, so closing a call's agent
+# reaches into the runtime's private registry. Only versions it was checked against are
+# trusted; anything else fails at startup instead of leaking an agent per call.
+AUTOGEN_REGISTRY_VERSIONS = ("0.7.",)
+
+def instantiated_agents() -> dict:
+    """The runtime's live agent instances, by AgentId."""
+    registry = getattr(runtime, "_instantiated_agents", None)
+    if not autogen_core.__version__.startswith(AUTOGEN_REGISTRY_VERSIONS) or not isinstance(registry, dict):
+        raise RuntimeError(
+            f"autogen-core {autogen_core.__version__} is untested with instantiated_agents(); "
+            "check how its runtime stores agent instances and update AUTOGEN_REGISTRY_VERSIONS"
+        )
+    return registry
+
+async def close_call_agent(agent_id: AgentId):
+    agent = instantiated_agents().pop(agent_id, None)
+    if agent is not None:
+        await agent.close()
+
+@app.on_event("startup")
+async def startup_event():
+    instantiated_agents()  # an unsupported autogen fails here, not at the first hang-up
+    await register_form_agent()
     # Launch the runtime.start() in a background thread to avoid blocking
     runtime.start()
+    await stt_pool.start()
+    background_tasks.append(asyncio.create_task(monitor_loop_lag()))
+    if PRERENDER_ENABLED and tts_cache is not None:
+        background_tasks.append(asyncio.create_task(prerender_form_prompts(tts_cache, load_form_prompts)))
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
     await runtime.stop_when_idle()
+    await stt_pool.close()
+    if tts_cache is not None:
+        await tts_cache.close()
+    await close_http_client()
+    # Let in-progress recordings reach disk before the process exits
+    await asyncio.to_thread(drain_recordings)
+    if tracer_provider is not None:
+        await asyncio.to_thread(tracer_provider.shutdown)
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 
 # ----- OpenAI -----
 
-async def get_chatgpt_response(prompt: str) -> str:
+async def get_chatgpt_response(agent_id: AgentId, prompt: str, cancellation_token: CancellationToken = None) -> str:
     try:
 
-        message = await runtime.send_message(TextMessage(content=prompt, source="user"), AgentId("assistant", "default"))
+        message = await runtime.send_message(
+            TextMessage(content=prompt, source="user", metadata=inject_trace_context({})),
+            agent_id,
+            cancellation_token=cancellation_token,
+        )
 
         return message.content
-    except Exception as e:
-        print("OpenAI error:", e)
+    except Exception:
+        log.exception("OpenAI error")
         return "Sorry, I had a problem generating a response."
 
+async def get_speculative_response(agent_id: AgentId, prompt: str, cancellation_token: CancellationToken) -> str | None:
+    # Same turn as get_chatgpt_response, but the agent keeps a snapshot so it can be rolled back
+    try:
+        message = await runtime.send_message(
+            TextMessage(content=prompt, source="user", metadata=inject_trace_context({"speculative": "true"})),
+            agent_id,
+            cancellation_token=cancellation_token,
+        )
+        return message.content if message else None
+    except Exception:
+        log.exception("OpenAI speculative error")
+        return None
+
+async def stream_chatgpt_response(agent_id: AgentId, prompt: str, cancellation_token: CancellationToken = None):
+    """Yields the agent's reply tokens as the model generates them."""
+    stream_id = uuid.uuid4().hex
+    tokens = reply_streams[stream_id] = asyncio.Queue()
+    send = asyncio.create_task(runtime.send_message(
+        TextMessage(content=prompt, source="user", metadata=inject_trace_context({"stream_id": stream_id})),
+        agent_id,
+        cancellation_token=cancellation_token,
+    ))
+    streamed = False
+    try:
+        while True:
+            next_token = asyncio.ensure_future(tokens.get())
+            await asyncio.wait({next_token, send}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_token.done():
+                # The message never reached the agent, so no end-of-stream marker is coming
+                next_token.cancel()
+                break
+            token = next_token.result()
+            if token is None:
+                break
+            streamed = True
+            yield token
+
+        message = await send
+        # A non-streaming model client produces no tokens, only the final message
+        if not streamed and message:
+            yield message.content
+    except Exception:
+        log.exception("OpenAI error")
+        if not streamed:
+            yield "Sorry, I had a problem generating a response."
+    finally:
+        reply_streams.pop(stream_id, None)
+        send.cancel()
+
+async def rollback_agent_turn(agent_id: AgentId):
+    await runtime.send_message(RollbackTurn(), agent_id)
+
 # ----- Deepgram TTS -----
-async def send_tts_to_twilio(text: str, streamsid: str, twilio_ws):
-    url = "https://api.deepgram.com/v1/speak?model=aura-asteria-en&encoding=mulaw&sample_rate=8000&container=none"
+async def send_media_frame(frame: bytes, session: CallSession, turn: Optional[ReplyTurn] = None):
+    if turn is not None and turn.awaiting_first_audio:
+        await on_first_reply_audio(session, turn)
+    await session.twilio_ws.send_text(session.serializer.media(frame))
+    session.on_audio_sent(len(frame))
+    if session.recorder is not None:
+        session.recorder.agent_audio(frame)
+
+async def send_media_payload(payload: str, session: CallSession, turn: Optional[ReplyTurn] = None):
+    if turn is not None and turn.awaiting_first_audio:
+        await on_first_reply_audio(session, turn)
+    await session.twilio_ws.send_text(session.serializer.media_payload(payload))
+    session.on_audio_sent(MULAW_FRAME_BYTES)
+    if session.recorder is not None:
+        session.recorder.agent_audio(binascii.a2b_base64(payload))
+
+async def send_mark(session: CallSession):
+    await session.twilio_ws.send_text(session.serializer.mark(session.mark_sent()))
+
+# ----- Latency masking -----
+async def play_filler(session: CallSession, turn: ReplyTurn):
+    await asyncio.sleep(FILLER_THRESHOLD_MS / 1000)
+    # Only ever played from cache: synthesizing it now would defeat the purpose
+    filler = await tts_cache.get(FILLER_TEXT) if tts_cache is not None else None
+    if filler is None:
+        log.warning("⏳ No reply audio after %d ms, but the filler is not pre-rendered", FILLER_THRESHOLD_MS)
+        return
+    for payload in filler.payloads:
+        await session.twilio_ws.send_text(session.serializer.media_payload(payload))
+        turn.filler_frames += 1
+        if session.recorder is not None:
+            session.recorder.agent_audio(binascii.a2b_base64(payload))
+        # Real-time pacing keeps Twilio's buffer short, so cutting it is near-instant
+        await asyncio.sleep(MULAW_FRAME_BYTES / 8000)
+
+async def on_first_reply_audio(session: CallSession, turn: ReplyTurn):
+    """Runs right before the first frame of a reply: cuts the filler and logs the turn."""
+    turn.awaiting_first_audio = False
+    turn.mark("first_media")
+    filler_task, turn.filler_task = turn.filler_task, None
+    if filler_task is not None:
+        filler_task.cancel()
+        await asyncio.gather(filler_task, return_exceptions=True)
+    if turn.filler_frames:
+        await session.twilio_ws.send_text(session.serializer.clear())
+        if session.recorder is not None:
+            session.recorder.agent_cleared()
+
+    first_audio_ms = (asyncio.get_running_loop().time() - turn.started_at) * 1000
+    log.info("⏱️ First reply audio after %.0f ms", first_audio_ms, extra={
+        "first_audio_ms": round(first_audio_ms),
+        "filler_threshold_ms": FILLER_THRESHOLD_MS,
+        "filler_ms": turn.filler_frames * 20,
+    })
+
+async def synthesize(text: str):
+    """Yields μ-law audio chunks for `text` as Deepgram streams them."""
+    url = f"{DEEPGRAM_BASE_URL}/v1/speak?model={TTS_MODEL}&encoding=mulaw&sample_rate=8000&container=none"
     headers = {
         "Authorization": f"Token {DEEPGRAM_API_KEY}",
         "Content-Type": "application/json",
     }
     payload = {"text": text}
-    response = requests.post(url, headers=headers, json=payload)
-
-    if response.status_code == 200:
-        raw_mulaw = response.content
-        media_message = {
-            "event": "media",
-            "streamSid": streamsid,
-            "media": {"payload": base64.b64encode(raw_mulaw).decode("ascii")},
-        }
-        await twilio_ws.send_text(json.dumps(media_message))
-    else:
-        print("TTS Error:", response.text)
+
+    async with get_http_client().stream("POST", url, headers=headers, json=payload) as response:
+        if response.status_code != 200:
+            await response.aread()
+            log.error("TTS error %d: %s", response.status_code, response.text)
+            return
+
+        async for chunk in response.aiter_bytes():
+            yield chunk
+
+# Repeated utterances are served from cache; identical concurrent requests share one synthesis
+tts_cache = TTSCache(synthesize, voice=TTS_MODEL, encoding="mulaw") if TTS_CACHE_ENABLED else None
+
+def tts_audio(text: str):
+    return tts_cache.stream(text) if tts_cache is not None else synthesize(text)
+
+async def send_tts_to_twilio(text: str, session: CallSession, turn: Optional[ReplyTurn] = None):
+    with tracer.start_as_current_span("tts.utterance", attributes={"tts.chars": len(text)}) as span:
+        framer = MulawFramer()
+        session.start_playback(text)
+
+        if tts_cache is not None:
+            cached = await tts_cache.get(text)
+            span.set_attribute("tts.cached", cached is not None)
+            if cached is not None:
+                # Cached audio is already framed and base64-encoded
+                for payload in cached.payloads:
+                    await send_media_payload(payload, session, turn)
+                await send_mark(session)
+                return
+
+        # Forward audio as soon as Deepgram streams it instead of waiting for the whole utterance
+        if turn is not None:
+            turn.mark("tts_request")
+        audio = tts_cache.fetch(text) if tts_cache is not None else synthesize(text)
+        async for chunk in audio:
+            if turn is not None:
+                turn.mark("tts_first_byte")
+            for frame in framer.push(chunk):
+                await send_media_frame(frame, session, turn)
+
+        tail = framer.flush()
+        if tail:
+            await send_media_frame(tail, session, turn)
+        await send_mark(session)
+
+async def send_sentences_to_twilio(sentences, session: CallSession, turn: ReplyTurn) -> str:
+    """
+    Synthesizes sentences concurrently as the LLM produces them and plays them in order,
+    so the caller hears the first sentence while the rest is still being generated.
+    Returns the full text that was spoken.
+    """
+    session.start_playback("")
+    playlist = asyncio.Queue()
+    prefetch_slots = asyncio.Semaphore(TTS_MAX_PREFETCH)
+    fetches = []
+
+    async def prefetch(sentence: str, audio: asyncio.Queue):
+        try:
+            async with prefetch_slots:
+                with tracer.start_as_current_span("tts.sentence", attributes={"tts.chars": len(sentence)}):
+                    turn.mark("tts_request")
+                    async for chunk in tts_audio(sentence):
+                        turn.mark("tts_first_byte")
+                        audio.put_nowait(chunk)
+        finally:
+            audio.put_nowait(None)
+
+    async def producer():
+        try:
+            async for sentence in sentences:
+                session.reply_text = f"{session.reply_text} {sentence}".strip()
+                audio = asyncio.Queue()
+                fetches.append(asyncio.create_task(prefetch(sentence, audio)))
+                playlist.put_nowait(audio)
+        finally:
+            playlist.put_nowait(None)
+
+    producing = asyncio.create_task(producer())
+    framer = MulawFramer()
+    try:
+        while (audio := await playlist.get()) is not None:
+            while (chunk := await audio.get()) is not None:
+                for frame in framer.push(chunk):
+                    await send_media_frame(frame, session, turn)
+            # One mark per sentence keeps the playback position exact during long replies
+            await send_mark(session)
+        tail = framer.flush()
+        if tail:
+            await send_media_frame(tail, session, turn)
+            await send_mark(session)
+        await producing  # surface producer errors
+    finally:
+        producing.cancel()
+        for fetch in fetches:
+            fetch.cancel()
+    return session.reply_text
+
+# ----- Barge-in -----
+async def reply_to_caller(transcript: str, session: CallSession, speech_final_at: float):
+    # The turn's span starts at speech_final and is current for everything the reply runs
+    turn = ReplyTurn(speech_final_at, tracer.start_span(
+        "turn",
+        context=session.trace_context,
+        start_time=epoch_ns(speech_final_at),
+        attributes={"turn.transcript_chars": len(transcript)},
+    ))
+    if FILLER_ENABLED:
+        turn.filler_task = asyncio.create_task(play_filler(session, turn))
+    outcome = "error"
+    try:
+        with trace.use_span(turn.span, end_on_exit=False):
+            await generate_and_speak(transcript, session, turn)
+        outcome = "completed"
+    except asyncio.CancelledError:
+        outcome = "interrupted"
+        raise
+    finally:
+        turn.awaiting_first_audio = False
+        if turn.filler_task is not None:
+            turn.filler_task.cancel()
+            turn.filler_task = None
+        stages = turn.timeline.finish(outcome)
+        turn.span.set_attribute("turn.outcome", outcome)
+        turn.span.end()
+        log.info("📊 Turn %s", outcome, extra={
+            "outcome": outcome,
+            "stages_ms": {stage: round(seconds * 1000) for stage, seconds in stages.items()},
+        })
+
+async def timed_tokens(tokens, turn: ReplyTurn):
+    async for token in tokens:
+        turn.mark("agent_first_token")
+        yield token
+    turn.mark("agent_end")
+
+async def generate_and_speak(transcript: str, session: CallSession, turn: ReplyTurn):
+    response_text = None
+    turn.mark("agent_start")
+    if session.speculator is not None:
+        response_text = await session.speculator.claim(transcript)
+    if response_text is None and LLM_STREAMING:
+        tokens = timed_tokens(stream_chatgpt_response(session.agent_id, transcript, session.cancellation_token), turn)
+        response_text = await send_sentences_to_twilio(sentences_from_tokens(tokens), session, turn)
+        log.info("ChatGPT: %s", response_text)
+        if supervisors.listening(session.streamsid):
+            supervisors.publish(session.streamsid, {"type": "agent", "text": response_text})
+        return
+    if response_text is None:
+        response_text = await get_chatgpt_response(session.agent_id, transcript, session.cancellation_token)
+    turn.mark("agent_first_token")
+    turn.mark("agent_end")
+    log.info("ChatGPT: %s", response_text)
+    if supervisors.listening(session.streamsid):
+        supervisors.publish(session.streamsid, {"type": "agent", "text": response_text})
+    await send_tts_to_twilio(response_text, session, turn)
+
+async def barge_in(session: CallSession):
+    # Drop the audio Twilio has buffered and stop generating the rest of the reply
+    record = session.interrupt()
+    await session.twilio_ws.send_text(session.serializer.clear())
+    if session.recorder is not None:
+        session.recorder.agent_cleared()
+    log.info("✋ Barge-in: caller heard %d ms of %d ms sent", record["heard_ms"], record["sent_ms"])
+    trace.get_current_span().add_event("barge_in", {"heard_ms": record["heard_ms"], "sent_ms": record["sent_ms"]})
+    if supervisors.listening(session.streamsid):
+        supervisors.publish(session.streamsid, {"type": "barge_in", **record})
 
 # ----- Deepgram STT Handler -----
-async def deepgram_stt(streamsid, twilio_ws, audio_queue):
-    # uri = "wss://api.deepgram.com/v1/listen?encoding=linear16&sample_rate=8000&model=nova-3"
-    uri = (
-        "wss://api.deepgram.com/v1/listen"
-        "?encoding=linear16"
-        "&sample_rate=8000"
-        "&language=en"
-        "&punctuate=true"
-        "&smart_format=true"
-        "&model=nova-3"
-        "&interim_results=true"
-        "&endpointing=500"
-        "&speech_final=true")
-
-    headers = {"Authorization": f"Token {DEEPGRAM_API_KEY}"}
-
-    async with websockets.connect(uri, extra_headers=headers) as dg_ws:
+# uri = "wss://api.deepgram.com/v1/listen?encoding=linear16&sample_rate=8000&model=nova-3"
+DEEPGRAM_LISTEN_URI = (
+    f"{DEEPGRAM_BASE_URL.replace('http', 'ws', 1)}/v1/listen"
+    f"?encoding={STT_ENCODING}"
+    "&sample_rate=8000"
+    "&language=en"
+    "&punctuate=true"
+    "&smart_format=true"
+    "&model=nova-3"
+    "&interim_results=true"
+    "&endpointing=500"
+    "&speech_final=true")
+
+# Warm, authenticated listen sockets handed out on each call's start event
+stt_pool = DeepgramConnectionPool(DEEPGRAM_LISTEN_URI, {"Authorization": f"Token {DEEPGRAM_API_KEY}"})
+
+async def deepgram_stt(session: CallSession, audio_queue: AudioQueue) -> bool:
+    """Streams the call's audio to Deepgram; returns True if the audio queue asked for a reconnect."""
+    if session.stt_coalescer is None:
+        session.stt_coalescer = FrameCoalescer()
+    coalescer = session.stt_coalescer
+    if VAD_ENABLED and session.vad_gate is None:
+        session.vad_gate = VoiceActivityGate()
+    gate = session.vad_gate
+
+    dg_ws, handshake_saved_s = await stt_pool.acquire()
+    if handshake_saved_s:
+        log.info("⚡ Deepgram STT connection from pool, saved %.0f ms of handshake", handshake_saved_s * 1000)
+
+    stt_span = tracer.start_span(
+        "deepgram.stt",
+        context=session.trace_context,
+        attributes={"stt.encoding": STT_ENCODING, "stt.handshake_saved_ms": round(handshake_saved_s * 1000)},
+    )
+    try:
+        # Overflows while we were (re)connecting already discarded their backlog
+        audio_queue.reconnect_requested.clear()
+
         async def send_audio():
+            decoder = MulawDecoder()
+            loop = asyncio.get_running_loop()
+            last_sent = loop.time()
             while True:
-                mulaw_audio = await audio_queue.get()
-                # Convert μ-law to 16-bit PCM
-                linear_audio = audioop.ulaw2lin(mulaw_audio, 2)  # 2 bytes (16-bit)
-                await dg_ws.send(linear_audio)
+                frames = await coalescer.next_chunk(audio_queue)
+
+                if gate is not None:
+                    frames = gate.process(frames)
+                    if not frames:
+                        # Deepgram closes idle sockets after ~10 s without audio
+                        if loop.time() - last_sent >= VAD_KEEPALIVE_S:
+                            await dg_ws.send(json.dumps({"type": "KeepAlive"}))
+                            gate.keepalives_sent += 1
+                            last_sent = loop.time()
+                        continue
+
+                if STT_ENCODING == "mulaw":
+                    chunk = b"".join(frames)
+                else:
+                    # Convert μ-law to 16-bit PCM
+                    chunk = decoder.decode_frames(frames)
+                await dg_ws.send(chunk)
+                coalescer.record_sent(len(chunk))
+                last_sent = loop.time()
 
         async def receive_transcript():
             buffer = ""
             async for message in dg_ws:
+                received_at = time.perf_counter()
                 msg = json.loads(message)
                 transcript = msg.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
                 is_final = msg.get("is_final", False)
                 speech_final = msg.get("speech_final", False)
 
-                print('is_final: ', is_final)
-                print('speech_final: ', speech_final)
+                # Many per second per call: debug level, formatted only if enabled
+                log.debug("Deepgram result is_final=%s speech_final=%s", is_final, speech_final)
 
                 if transcript:
-                    print("You:", transcript)
-                
+                    if is_final:
+                        log.info("You: %s", transcript, extra={"speech_final": speech_final})
+                    else:
+                        log.debug("You (interim): %s", transcript)
+                    if supervisors.listening(session.streamsid):
+                        supervisors.publish(session.streamsid, {
+                            "type": "transcript",
+                            "text": transcript,
+                            "is_final": is_final,
+                            "speech_final": speech_final,
+                        })
+
+                # Interim results arrive within a few hundred ms of the caller starting to talk
+                if BARGE_IN_ENABLED and transcript.strip() and session.agent_speaking:
+                    await barge_in(session)
+
+                if session.speculator is not None and transcript.strip() and not speech_final:
+                    session.speculator.on_interim(transcript)
+
                 if is_final and speech_final and transcript.strip():
+                    stt_span.add_event("speech_final", {"transcript_chars": len(transcript)})
                     user_input = transcript.strip().lower()
                     if "goodbye" in user_input or "exit" in user_input:
-                        farewell = "Goodbye! Ending the call now."
-                        print("ChatGPT:", farewell)
-                        await send_tts_to_twilio(farewell, streamsid, twilio_ws)
-                        await asyncio.sleep(2)  # allow time for playback
-                        await twilio_ws.close()
+                        if session.speculator is not None:
+                            await session.speculator.discard()
+                        log.info("ChatGPT: %s", FAREWELL)
+                        if supervisors.listening(session.streamsid):
+                            supervisors.publish(session.streamsid, {"type": "agent", "text": FAREWELL})
+                        await send_tts_to_twilio(FAREWELL, session)
+                        # Hang up the moment Twilio reports the farewell has played
+                        if not await session.wait_played():
+                            log.warning("⚠️ No playback mark from Twilio, hanging up after the farewell's duration")
+                        await session.twilio_ws.close()
                         break
 
                 if is_final and speech_final and transcript.strip():
-                    response_text = await get_chatgpt_response(transcript.strip())
-                    print("ChatGPT:", response_text)
-                    await send_tts_to_twilio(response_text, streamsid, twilio_ws)
-
-        await asyncio.gather(send_audio(), receive_transcript())
+                    reply_task = session.start_reply(reply_to_caller(transcript.strip(), session, received_at))
+                    if not BARGE_IN_ENABLED:
+                        await reply_task
+
+        with trace.use_span(stt_span, end_on_exit=False):
+            tasks = [
+                asyncio.create_task(send_audio()),
+                asyncio.create_task(receive_transcript()),
+                asyncio.create_task(audio_queue.reconnect_requested.wait()),
+            ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            task.result()  # surface errors such as WebSocketDisconnect
+        return audio_queue.reconnect_requested.is_set()
+    finally:
+        stt_span.end()
+        if audio_queue.reconnect_requested.is_set():
+            # This socket stalled; a closing handshake would wait on a peer that isn't
+            # reading, so drop the connection and let the caller reconnect right away
+            dg_ws.transport.abort()
+        else:
+            await dg_ws.close()
 
 # ----- Twilio Handler -----
 @app.websocket("/twilio")
 async def twilio_handler(twilio_ws: WebSocket):
     await twilio_ws.accept()
-    audio_queue = asyncio.Queue()
-    streamsid = None
+    audio_queue = AudioQueue()
+    session = CallSession(twilio_ws)
+    ACTIVE_CALLS.inc()
+    jitter_buffer = JitterBuffer() if JITTER_BUFFER_ENABLED else None
+    capture = TwilioCapture() if CAPTURE_ENABLED else None
+
+    def deliver(frame: bytes):
+        audio_queue.offer(frame)
+        if session.recorder is not None:
+            session.recorder.caller_audio(frame)
 
     async def twilio_receiver():
-        nonlocal streamsid
         try:
             async for raw_msg in twilio_ws.iter_text():
-                data = json.loads(raw_msg)
-                if data["event"] == "start":
-                    streamsid = data["start"]["streamSid"]
-                    print(f"🔗 Twilio Stream Started: {streamsid}")
-                elif data["event"] == "media":
-                    payload = data["media"]["payload"]
-                    raw_audio = base64.b64decode(payload)
-                    await audio_queue.put(raw_audio)
-                elif data["event"] == "stop":
-                    print("🛑 Twilio Stream Ended")
+                event, media, data = parse_message(raw_msg)
+                if capture is not None:
+                    capture.record(raw_msg, media)
+                if event == "media":
+                    if jitter_buffer is None:
+                        deliver(media.audio)
+                    else:
+                        for frame in jitter_buffer.push(media.audio, media.chunk, media.timestamp):
+                            deliver(frame)
+                elif event == "start":
+                    session.streamsid = data["start"]["streamSid"]
+                    session.serializer = MediaSerializer(session.streamsid)
+                    bind_call(session.streamsid)
+                    if RECORDING_ENABLED:
+                        session.recorder = CallRecorder(os.path.join(RECORDING_DIR, f"{session.streamsid}.wav"))
+                    session.call_span = start_call_span(session.streamsid, data["start"].get("callSid"))
+                    session.trace_context = trace.set_span_in_context(session.call_span)
+                    session.agent_id = await open_call_agent(session.streamsid)
+                    if SPECULATIVE_ENABLED:
+                        session.speculator = Speculator(
+                            functools.partial(get_speculative_response, session.agent_id),
+                            functools.partial(rollback_agent_turn, session.agent_id),
+                        )
+                    session.started.set()
+                    supervisors.call_started(session.streamsid)
+                    if capture is not None:
+                        capture.set_stream_sid(session.streamsid)
+                    log.info("🔗 Twilio Stream Started")
+                elif event == "mark":
+                    session.on_mark(data["mark"]["name"])
+                elif event == "stop":
+                    if jitter_buffer is not None:
+                        for frame in jitter_buffer.flush():
+                            deliver(frame)
+                    log.info("🛑 Twilio Stream Ended")
                     break
         except WebSocketDisconnect:
-            print("🛑 FastAPI WebSocket disconnected in receiver")
+            log.info("🛑 FastAPI WebSocket disconnected in receiver")
 
     async def stt_task():
         try:
-            while streamsid is None:
-                await asyncio.sleep(0.05)
-            await deepgram_stt(streamsid, twilio_ws, audio_queue)
+            await session.started.wait()
+            bind_call(session.streamsid)
+            while await deepgram_stt(session, audio_queue):
+                log.warning("🔁 Audio queue overflowed, reconnecting Deepgram STT")
         except WebSocketDisconnect:
-            print("🛑 WebSocket disconnected in STT")
+            log.info("🛑 WebSocket disconnected in STT")
 
-    await asyncio.gather(twilio_receiver(), stt_task())
+    receiving = asyncio.create_task(twilio_receiver())
+    transcribing = asyncio.create_task(stt_task())
+    try:
+        await asyncio.wait({receiving, transcribing}, return_when=asyncio.FIRST_COMPLETED)
+        if not receiving.done() and transcribing.exception() is None:
+            # Transcription ended first (the farewell hung up); the receiver sees the socket close
+            await receiving
+        for task in (receiving, transcribing):
+            if task.done():
+                task.result()  # surface errors
+    finally:
+        # Once Twilio stops streaming there's no need to wait for Deepgram to notice
+        for task in (receiving, transcribing):
+            task.cancel()
+        await asyncio.gather(receiving, transcribing, return_exceptions=True)
+        if session.reply_task is not None and not session.reply_task.done():
+            session.cancellation_token.cancel()
+            session.reply_task.cancel()
+            await asyncio.gather(session.reply_task, return_exceptions=True)
+        ACTIVE_CALLS.dec()
+        supervisors.call_ended(session.streamsid)
+        # One record with every stage's counters for the call
+        stats = {"audio_queue": audio_queue.stats(), "stt_pool": stt_pool.stats()}
+        if jitter_buffer is not None:
+            stats["jitter_buffer"] = jitter_buffer.stats()
+        if session.stt_coalescer is not None:
+            stats["stt_coalescing"] = session.stt_coalescer.stats()
+        if session.vad_gate is not None:
+            stats["vad_gate"] = session.vad_gate.stats()
+        if session.speculator is not None:
+            await session.speculator.discard()
+            stats["speculation"] = session.speculator.stats()
+        if session.agent_id is not None:
+            await close_call_agent(session.agent_id)
+        if tts_cache is not None:
+            stats["tts_cache"] = tts_cache.stats()
+        if session.recorder is not None:
+            session.recorder.close()
+            stats["recording"] = session.recorder.stats()
+        if capture is not None:
+            capture.close()
+            stats["capture"] = {"messages": capture.messages, "path": capture.path}
+        bind_call(session.streamsid)
+        log.info("📊 Call stats", extra=stats)
+        if session.call_span is not None:
+            session.call_span.end()
+
+# ----- Supervisor Handler -----
+# Supervisors watch one live call: they connect, receive the active stream SIDs and send
+# back the one to follow (or pass ?stream_sid= up front), then get a JSON event per
+# transcript, agent reply and barge-in until the call ends. They authenticate with
+# SUPERVISOR_TOKEN, as "Authorization: Bearer <token>" or ?token=<token>.
+supervisors = SupervisorHub()
+
+
+def supervisor_authorized(supervisor_ws: WebSocket) -> bool:
+    if not SUPERVISOR_TOKEN:
+        return False
+    token = supervisor_ws.query_params.get("token", "")
+    authorization = supervisor_ws.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):].strip()
+    return hmac.compare_digest(token.encode(), SUPERVISOR_TOKEN.encode())
+
+
+@app.websocket("/supervisor")
+async def supervisor_handler(supervisor_ws: WebSocket):
+    if not supervisor_authorized(supervisor_ws):
+        # Closing before accept() rejects the handshake with HTTP 403
+        log.warning("🚫 Supervisor rejected", extra={"client": str(supervisor_ws.client)})
+        await supervisor_ws.close(code=1008)
+        return
+    await supervisor_ws.accept()
+    subscriber = None
+    try:
+        stream_sid = supervisor_ws.query_params.get("stream_sid")
+        if not stream_sid:
+            await supervisor_ws.send_text(json.dumps(list(supervisors.active_calls)))
+            stream_sid = (await supervisor_ws.receive_text()).strip()
+
+        subscriber = supervisors.subscribe(stream_sid)
+        if subscriber is None:
+            await supervisor_ws.send_text(json.dumps({"type": "error", "error": f"No active call {stream_sid}"}))
+            await supervisor_ws.close()
+            return
+        log.info("👀 Supervisor watching", extra={"watching": stream_sid})
+
+        async def sender():
+            while (message := await subscriber.queue.get()) is not None:
+                await supervisor_ws.send_text(message)
+            await supervisor_ws.close()
+
+        async def receiver():
+            # Only here to notice the supervisor disconnecting while the call is quiet
+            while True:
+                await supervisor_ws.receive_text()
+
+        tasks = [asyncio.create_task(sender()), asyncio.create_task(receiver())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if subscriber is not None:
+            supervisors.unsubscribe(subscriber)
+            log.info("👀 Supervisor left (%d events dropped)", subscriber.dropped, extra={"watching": subscriber.stream_sid})
 
 # ----- WebSocket Server Router -----
 async def router(websocket, path):
     if path == "/twilio":
-        print("🌐 Incoming Twilio connection...")
+        log.info("🌐 Incoming Twilio connection...")
         await twilio_handler(websocket)
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from structured_log import dropped_records
+
+# Minimal Prometheus-style metrics: a handful of histograms, counters and gauges rendered in
+# the text exposition format for GET /metrics. Observing is a bisect and two additions, so
+# it is cheap enough for every turn.
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+_registry: List["_Metric"] = []
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class CallbackCounter(_Metric):
+    """A counter kept elsewhere (e.g. on another thread's object), read when rendered."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self._read = read
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name} {float(self._read())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum, count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+        counts, totals = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, (total, count)) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {int(count)}")
+        return lines
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+# ----- Voice pipeline metrics -----
+TURN_STAGE_SECONDS = Histogram(
+    "voice_turn_stage_seconds", "Duration of each stage of a conversation turn", ["stage"])
+TURNS_TOTAL = Counter("voice_turns_total", "Conversation turns by outcome", ["outcome"])
+LLM_CALL_SECONDS = Histogram(
+    "voice_llm_call_seconds", "Model calls inside an agent turn", ["call"])
+TOOL_CALL_SECONDS = Histogram("voice_tool_call_seconds", "Agent tool executions", ["tool"])
+ACTIVE_CALLS = Gauge("voice_active_calls", "Calls currently connected")
+LOG_RECORDS_DROPPED = CallbackCounter(
+    "voice_log_records_dropped_total", "Log records dropped because the log queue was full", dropped_records)
+LOOP_LAG_SECONDS = Histogram(
+    "voice_event_loop_lag_seconds", "How late the event loop woke a 100 ms timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+# A stage is the time between two marks of a turn; marks missing from a turn (a cache hit
+# never requests TTS, a barge-in never finishes) simply skip the stages that need them.
+# Without LLM streaming the agent's first token is its whole reply.
+TURN_STAGES = (
+    ("stt_to_agent", "speech_final", "agent_start"),
+    ("agent_first_token", "agent_start", "agent_first_token"),
+    ("agent", "agent_start", "agent_end"),
+    ("agent_to_tts", "agent_first_token", "tts_request"),
+    ("tts_first_byte", "tts_request", "tts_first_byte"),
+    ("tts_to_media", "tts_first_byte", "first_media"),
+    ("speech_final_to_media", "speech_final", "first_media"),
+)
+
+
+class TurnTimeline:
+    """Timestamps of one turn's milestones; each mark keeps its first occurrence."""
+
+    def __init__(self, speech_final_at: Optional[float] = None):
+        self.marks: Dict[str, float] = {}
+        if speech_final_at is not None:
+            self.marks["speech_final"] = speech_final_at
+
+    def mark(self, name: str) -> None:
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter()
+
+    def durations(self) -> Dict[str, float]:
+        return {
+            stage: self.marks[end] - self.marks[start]
+            for stage, start, end in TURN_STAGES
+            if start in self.marks and end in self.marks
+        }
+
+    def finish(self, outcome: str) -> Dict[str, float]:
+        durations = self.durations()
+        for stage, seconds in durations.items():
+            TURN_STAGE_SECONDS.observe(seconds, stage=stage)
+        TURNS_TOTAL.inc(outcome=outcome)
+        return durations
+
+
+async def monitor_loop_lag(interval_s: float = 0.1) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - expected))
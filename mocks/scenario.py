@@ -0,0 +1,147 @@
+import asyncio
+import copy
+import json
+import math
+import random
+from typing import Any, Dict, Optional
+
+# Behaviour of the mock services. A scenario file (JSON) only needs the keys it changes;
+# they are merged over these defaults. Latencies are in ms and take one of:
+#   {"distribution": "fixed", "ms": 200}
+#   {"distribution": "uniform", "min_ms": 100, "max_ms": 300}
+#   {"distribution": "normal", "mean_ms": 200, "std_ms": 50}
+#   {"distribution": "lognormal", "median_ms": 200, "p95_ms": 600}
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "seed": None,
+    "deepgram_listen": {
+        # Time from end of speech (after endpointing) to the final result
+        "latency": {"distribution": "lognormal", "median_ms": 120, "p95_ms": 350},
+        "error_rate": 0.0,
+        "speech_threshold_dbfs": -45,
+        "interim_every_ms": 300,
+        "ms_per_word": 250,
+        # Utterances are recognized in this order, cycling per connection
+        "transcripts": [
+            "Hi, I'd like to fill out the intake form.",
+            "My name is Jordan Smith.",
+            "My date of birth is March third, nineteen ninety.",
+            "It's five five five, one two three, four five six seven.",
+            "I have a follow-up appointment.",
+            "Goodbye.",
+        ],
+    },
+    "deepgram_speak": {
+        # Time to first audio byte
+        "latency": {"distribution": "lognormal", "median_ms": 200, "p95_ms": 500},
+        "error_rate": 0.0,
+        "ms_per_char": 60,
+        # Audio is produced this many times faster than it plays
+        "realtime_factor": 5,
+    },
+    "openai": {
+        # Time to first token
+        "latency": {"distribution": "lognormal", "median_ms": 450, "p95_ms": 1200},
+        "error_rate": 0.0,
+        "tokens_per_s": 60,
+        "replies": [
+            "Thanks! To get started, can you tell me your full name?",
+            "Got it. What is your date of birth?",
+            "Thank you. What is the best phone number to reach you?",
+            "Great. What is the reason for your visit today?",
+            "Thanks, that's everything I need. Your form has been submitted.",
+        ],
+    },
+    "jotform": {
+        "latency": {"distribution": "lognormal", "median_ms": 80, "p95_ms": 250},
+        "error_rate": 0.0,
+        "form": {
+            "title": "Patient Intake",
+            "questions": [
+                {"qid": "1", "type": "control_head", "text": "Patient Intake", "readonly": "Yes"},
+                {"qid": "2", "type": "control_fullname", "name": "fullName", "text": "Full Name", "readonly": "No", "required": "Yes"},
+                {"qid": "3", "type": "control_datetime", "name": "dateOf", "text": "Date of Birth", "readonly": "No", "required": "Yes"},
+                {"qid": "4", "type": "control_phone", "name": "phoneNumber", "text": "Phone Number", "readonly": "No", "required": "No"},
+                {"qid": "5", "type": "control_textarea", "name": "reasonFor", "text": "What is the reason for your visit?", "readonly": "No", "required": "No"},
+            ],
+        },
+    },
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_scenario(path: Optional[str] = None) -> Dict[str, Any]:
+    if path is None:
+        return copy.deepcopy(DEFAULT_SCENARIO)
+    with open(path, encoding="utf-8") as f:
+        return _merge(DEFAULT_SCENARIO, json.load(f))
+
+
+class Latency:
+    """Samples delays (in seconds) from one of the scenario's latency distributions."""
+
+    def __init__(self, spec: Dict[str, Any], rng: random.Random):
+        self.spec = spec
+        self.rng = rng
+        self.distribution = spec.get("distribution", "fixed")
+        if self.distribution not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {self.distribution!r}")
+
+    def sample(self) -> float:
+        spec = self.spec
+        if self.distribution == "fixed":
+            ms = spec.get("ms", 0)
+        elif self.distribution == "uniform":
+            ms = self.rng.uniform(spec["min_ms"], spec["max_ms"])
+        elif self.distribution == "normal":
+            ms = self.rng.gauss(spec["mean_ms"], spec["std_ms"])
+        else:
+            # p95 sits 1.645 standard deviations above the median in log space
+            sigma = math.log(spec["p95_ms"] / spec["median_ms"]) / 1.645
+            ms = self.rng.lognormvariate(math.log(spec["median_ms"]), sigma)
+        return max(ms, 0) / 1000
+
+
+class MockService:
+    """Latency and error injection plus counters for one mocked upstream."""
+
+    def __init__(self, name: str, config: Dict[str, Any], rng: random.Random):
+        self.name = name
+        self.config = config
+        self.rng = rng
+        self.latency = Latency(config.get("latency", {}), rng)
+        self.error_rate = float(config.get("error_rate", 0.0))
+
+        self.requests = 0
+        self.errors = 0
+        self.delays = 0
+        self.delay_s = 0.0
+
+    def begin(self) -> bool:
+        """Counts a request; returns False if this one should fail."""
+        self.requests += 1
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return False
+        return True
+
+    async def delay(self) -> None:
+        seconds = self.latency.sample()
+        self.delays += 1
+        self.delay_s += seconds
+        await asyncio.sleep(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_delay_ms": round(self.delay_s / max(self.delays, 1) * 1000, 1),
+        }
@@ -0,0 +1,255 @@
+"""
+Local stand-ins for Deepgram (listen + speak), OpenAI chat completions and Jotform, so
+the app can be run and load tested offline. One process serves all three:
+
+    python -m mocks.server --port 8100 [--scenario scenario.json]
+
+    DEEPGRAM_BASE_URL=http://localhost:8100
+    OPENAI_BASE_URL=http://localhost:8100/openai/v1
+    JOTFORM_BASE_URL=http://localhost:8100/jotform/
+
+Latency distributions, error rates, transcripts and replies come from the scenario
+(see mocks/scenario.py). GET /mock/stats reports per-service request and error counts.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_codec import MULAW_FRAME_BYTES, SAMPLE_RATE, ULAW_TO_LINEAR  # noqa: E402
+from mocks.scenario import MockService, load_scenario  # noqa: E402
+
+
+def _tone(seconds: float = 1.0, hz: float = 220.0, level: float = 0.1) -> bytes:
+    """A quiet μ-law tone to stand in for synthesized speech."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pcm = level * 32767 * np.sin(2 * np.pi * hz * t)
+    # Nearest μ-law code word for each sample
+    codes = np.abs(pcm[:, None] - ULAW_TO_LINEAR[None, :].astype(np.float64)).argmin(axis=1)
+    return codes.astype(np.uint8).tobytes()
+
+
+def _speech_dbfs(audio: bytes, encoding: str) -> np.ndarray:
+    """Per-20 ms energy of an uplink message in either encoding Deepgram is sent."""
+    if encoding == "mulaw":
+        pcm = ULAW_TO_LINEAR[np.frombuffer(audio, dtype=np.uint8)]
+    else:
+        pcm = np.frombuffer(audio[: len(audio) // 2 * 2], dtype="<i2")
+    pcm = pcm.astype(np.float32)
+    frame = MULAW_FRAME_BYTES  # samples per 20 ms
+    usable = len(pcm) // frame * frame
+    if not usable:
+        return np.empty(0)
+    energy = (pcm[:usable].reshape(-1, frame) ** 2).mean(axis=1)
+    return 10 * np.log10(energy / (32768.0 * 32768.0) + 1e-12)
+
+
+def create_app(scenario: Dict[str, Any]) -> FastAPI:
+    rng = random.Random(scenario.get("seed"))
+    listen = MockService("deepgram_listen", scenario["deepgram_listen"], rng)
+    speak = MockService("deepgram_speak", scenario["deepgram_speak"], rng)
+    llm = MockService("openai", scenario["openai"], rng)
+    jotform = MockService("jotform", scenario["jotform"], rng)
+    replies = itertools.cycle(llm.config["replies"])
+    tone = _tone()
+
+    app = FastAPI()
+
+    @app.get("/mock/stats")
+    async def stats():
+        return {service.name: service.stats() for service in (listen, speak, llm, jotform)}
+
+    # ----- Deepgram listen -----
+    @app.websocket("/v1/listen")
+    async def deepgram_listen(ws: WebSocket):
+        await ws.accept()
+        if not listen.begin():
+            await ws.close(code=1011, reason="mock: injected error")
+            return
+
+        params = ws.query_params
+        encoding = params.get("encoding", "linear16")
+        endpointing_s = int(params.get("endpointing", "500")) / 1000
+        interim_results = params.get("interim_results", "false") == "true"
+        config = listen.config
+        threshold = config["speech_threshold_dbfs"]
+        transcripts = itertools.cycle(config["transcripts"])
+
+        state = {"words": [], "speech_s": 0.0, "silence_s": 0.0, "next_interim_s": 0.0}
+        finals: List[asyncio.Task] = []
+        audio_s = 0.0
+
+        def result(text: str, is_final: bool, speech_final: bool) -> str:
+            return orjson.dumps({
+                "type": "Results",
+                "channel_index": [0, 1],
+                "start": round(audio_s, 2),
+                "is_final": is_final,
+                "speech_final": speech_final,
+                "channel": {"alternatives": [{"transcript": text, "confidence": 0.99, "words": []}]},
+            }).decode()
+
+        async def send_final(text: str):
+            await listen.delay()
+            await ws.send_text(result(text, True, True))
+
+        def end_utterance():
+            text = " ".join(state["words"])
+            state.update(words=[], speech_s=0.0, silence_s=0.0, next_interim_s=0.0)
+            finals.append(asyncio.create_task(send_final(text)))
+
+        try:
+            while True:
+                timeout = endpointing_s if state["words"] else None
+                try:
+                    message = await asyncio.wait_for(ws.receive(), timeout)
+                except asyncio.TimeoutError:
+                    # Audio stopped mid-utterance (e.g. the client gates silence)
+                    end_utterance()
+                    continue
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is not None:
+                    if '"CloseStream"' in message["text"]:
+                        break
+                    continue  # KeepAlive
+
+                frame_s = MULAW_FRAME_BYTES / SAMPLE_RATE
+                for dbfs in _speech_dbfs(message["bytes"], encoding):
+                    audio_s += frame_s
+                    if dbfs > threshold:
+                        if not state["words"]:
+                            state["words"] = next(transcripts).split()
+                        state["speech_s"] += frame_s
+                        state["silence_s"] = 0.0
+                        if interim_results and state["speech_s"] >= state["next_interim_s"] + config["interim_every_ms"] / 1000:
+                            state["next_interim_s"] = state["speech_s"]
+                            heard = max(1, int(state["speech_s"] * 1000 / config["ms_per_word"]))
+                            await ws.send_text(result(" ".join(state["words"][:heard]), False, False))
+                    elif state["words"]:
+                        state["silence_s"] += frame_s
+                        if state["silence_s"] >= endpointing_s:
+                            end_utterance()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in finals:
+                task.cancel()
+
+    # ----- Deepgram speak -----
+    @app.post("/v1/speak")
+    async def deepgram_speak(request: Request):
+        body = await request.json()
+        if not speak.begin():
+            return JSONResponse({"err_code": "MOCK_ERROR", "err_msg": "mock: injected error"}, status_code=500)
+        config = speak.config
+        total = int(len(body.get("text", "")) * config["ms_per_char"] * SAMPLE_RATE / 1000)
+        chunk_bytes = SAMPLE_RATE // 5  # 200 ms
+
+        async def audio():
+            await speak.delay()
+            for start in range(0, total, chunk_bytes):
+                n = min(chunk_bytes, total - start)
+                yield tone[:n]
+                await asyncio.sleep(n / SAMPLE_RATE / config["realtime_factor"])
+
+        return StreamingResponse(audio(), media_type="audio/basic")
+
+    # ----- OpenAI chat completions -----
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if not llm.begin():
+            return JSONResponse({"error": {"message": "mock: injected error", "type": "server_error"}}, status_code=500)
+        reply = next(replies)
+        model = body.get("model", "gpt-4o")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        tokens = [word + " " for word in reply.split(" ")]
+        tokens[-1] = tokens[-1].rstrip()
+        usage = {"prompt_tokens": 100, "completion_tokens": len(tokens), "total_tokens": 100 + len(tokens)}
+        token_s = 1 / llm.config["tokens_per_s"]
+
+        if not body.get("stream"):
+            await llm.delay()
+            await asyncio.sleep(token_s * len(tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        def chunk(delta: Dict[str, Any], finish_reason=None, **extra) -> bytes:
+            choices = [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else []
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                       "model": model, "choices": choices, **extra}
+            return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+        async def events():
+            await llm.delay()
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                yield chunk({"content": token})
+                await asyncio.sleep(token_s)
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk(None, usage=usage)
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # ----- Jotform -----
+    form = jotform.config["form"]
+
+    async def jotform_response(content: Any):
+        if not jotform.begin():
+            return JSONResponse({"responseCode": 500, "message": "mock: injected error", "content": ""}, status_code=500)
+        await jotform.delay()
+        return {"responseCode": 200, "message": "success", "content": content}
+
+    @app.get("/jotform/v1/form/{form_id}")
+    async def jotform_form(form_id: str):
+        return await jotform_response({"id": form_id, "title": form["title"], "status": "ENABLED"})
+
+    @app.get("/jotform/v1/form/{form_id}/questions")
+    async def jotform_questions(form_id: str):
+        return await jotform_response({
+            question["qid"]: {**question, "order": str(order)}
+            for order, question in enumerate(form["questions"], start=1)
+        })
+
+    @app.post("/jotform/v1/form/{form_id}/submissions")
+    async def jotform_submit(form_id: str):
+        submission_id = str(random.randrange(10**18, 10**19))
+        return await jotform_response({"submissionID": submission_id, "URL": f"https://www.jotform.com/submission/{submission_id}"})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--scenario", help="JSON file overriding mocks/scenario.py defaults")
+    args = parser.parse_args()
+    uvicorn.run(create_app(load_scenario(args.scenario)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
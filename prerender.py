@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import os
+from typing import Awaitable, Callable, List
+
+from structured_log import get_logger
+from tts_cache import TTSCache
+
+log = get_logger("prerender")
+
+# Spoken prompts for every form question (plus the fixed identity/farewell lines) are
+# rendered into the TTS cache before calls need them. The job re-checks the form
+# periodically and only renders again when the prompt list changes; prompts dropped from
+# the list are unpinned so the memory tier can evict them.
+PRERENDER_ENABLED = os.getenv("PRERENDER_ENABLED", "true").lower() == "true"
+PRERENDER_REFRESH_S = float(os.getenv("PRERENDER_REFRESH_S", "600"))
+PRERENDER_CONCURRENCY = int(os.getenv("PRERENDER_CONCURRENCY", "4"))
+
+
+def prompts_fingerprint(prompts: List[str]) -> str:
+    return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()
+
+
+async def render_prompts(tts_cache: TTSCache, prompts: List[str]) -> int:
+    """Caches and pins audio for each prompt; returns how many needed a TTS request."""
+    slots = asyncio.Semaphore(PRERENDER_CONCURRENCY)
+
+    async def render(prompt: str) -> bool:
+        async with slots:
+            return await tts_cache.warm(prompt, pin=True)
+
+    rendered = await asyncio.gather(*(render(prompt) for prompt in prompts))
+    return sum(rendered)
+
+
+async def prerender_form_prompts(
+    tts_cache: TTSCache,
+    load_prompts: Callable[[], Awaitable[List[str]]],
+    refresh_s: float = PRERENDER_REFRESH_S,
+) -> None:
+    """
+    Background job: `load_prompts` is awaited every `refresh_s` seconds, and the prompts are
+    rendered whenever their fingerprint changes.
+    """
+    fingerprint = None
+    pinned: List[str] = []
+    while True:
+        try:
+            prompts = list(dict.fromkeys(p for p in await load_prompts() if p))
+            current = prompts_fingerprint(prompts)
+            if current != fingerprint:
+                synthesized = await render_prompts(tts_cache, prompts)
+                for prompt in set(pinned) - set(prompts):
+                    tts_cache.unpin(prompt)
+                fingerprint, pinned = current, prompts
+                log.info("🎙️ Pre-rendered %d prompts (%d synthesized, %d already cached)",
+                         len(prompts), synthesized, len(prompts) - synthesized)
+        except Exception:
+            log.exception("Pre-render error")
+
+        if refresh_s <= 0:
+            return
+        await asyncio.sleep(refresh_s)
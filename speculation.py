@@ -0,0 +1,145 @@
+import asyncio
+import os
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from autogen_core import CancellationToken
+
+# Start the agent turn once an interim transcript has stopped changing, instead of waiting
+# out Deepgram's endpointing; the result is only used if the final transcript matches.
+SPECULATIVE_ENABLED = os.getenv("SPECULATIVE_ENABLED", "false").lower() == "true"
+SPECULATIVE_STABLE_MS = int(os.getenv("SPECULATIVE_STABLE_MS", "300"))
+
+
+def normalize_transcript(text: str) -> str:
+    # Interim and final results differ in punctuation/casing (smart_format), not in meaning
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class Speculator:
+    """
+    Runs at most one speculative agent turn per call.
+
+    `respond(text, token)` runs a speculative turn and returns the reply (or None if the
+    agent declined); `rollback()` undoes the agent state of the last turn.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[str, CancellationToken], Awaitable[Optional[str]]],
+        rollback: Callable[[], Awaitable[None]],
+        stable_ms: int = SPECULATIVE_STABLE_MS,
+    ):
+        self._respond = respond
+        self._rollback = rollback
+        self.stable_after = stable_ms / 1000
+
+        self._candidate = ""
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # The in-flight speculation
+        self.text: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.token: Optional[CancellationToken] = None
+        self.started_at = 0.0
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_s = 0.0
+
+    def on_interim(self, transcript: str) -> None:
+        candidate = normalize_transcript(transcript)
+        if not candidate or candidate == self._candidate:
+            return
+        self._candidate = candidate
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.stable_after, self._start, transcript.strip(), candidate)
+
+    def _start(self, transcript: str, candidate: str) -> None:
+        self._timer = None
+        if self.text == candidate:
+            return
+        previous = self._discard_current()
+
+        self.text = candidate
+        self.token = CancellationToken()
+        self.started_at = time.monotonic()
+        self.started += 1
+        self.task = asyncio.create_task(self._run(transcript, self.token, previous))
+
+    async def _run(self, transcript: str, token: CancellationToken, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            # The stale speculation's rollback must land before this turn snapshots state
+            await previous
+        response = await self._respond(transcript, token)
+        return response, time.monotonic()
+
+    def _discard_current(self) -> Optional[asyncio.Task]:
+        task, token = self.task, self.token
+        self.text = self.task = self.token = None
+        if task is None:
+            return None
+        self.misses += 1
+        token.cancel()
+        task.cancel()
+        return asyncio.create_task(self._cleanup(task))
+
+    async def _cleanup(self, task: asyncio.Task) -> None:
+        try:
+            await task
+        except BaseException:
+            pass
+        await self._rollback()
+
+    async def discard(self) -> None:
+        """Drops any pending or in-flight speculation and rolls its agent state back."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._candidate = ""
+        cleanup = self._discard_current()
+        if cleanup is not None:
+            await cleanup
+
+    async def claim(self, transcript: str) -> Optional[str]:
+        """
+        Called with the final transcript. Returns the speculative reply if it was made for
+        the same words, otherwise discards it and returns None.
+        """
+        if self.task is None or normalize_transcript(transcript) != self.text:
+            await self.discard()
+            return None
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._candidate = ""
+        task, token, started_at = self.task, self.token, self.started_at
+        self.text = self.task = self.token = None
+
+        final_at = time.monotonic()
+        try:
+            response, done_at = await task
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Without speculation the turn would have started at final_at and taken as long
+        self.saved_s += min(final_at - started_at, done_at - started_at)
+        return response
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / (self.hits + self.misses), 3) if self.hits + self.misses else 0.0,
+            "saved_ms": round(self.saved_s * 1000),
+        }
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+# JSON-lines logging for the app. Records are handed to a bounded queue on the calling
+# thread and formatted and written by a listener thread, so a slow stdout never blocks the
+# event loop; when the queue is full records are dropped (and counted) instead.
+#
+# Each record carries the stream SID of the call it was logged from (see bind_call), and
+# anything passed as `extra=` becomes a JSON field. Use %-style arguments rather than
+# f-strings: a disabled level then costs a level check and nothing else.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER = "voice_agent"
+
+_call_sid: ContextVar[Optional[str]] = ContextVar("stream_sid", default=None)
+
+# Attributes every LogRecord has; everything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "stream_sid"}
+
+
+def bind_call(stream_sid: Optional[str]) -> None:
+    """Tags records logged from this task, and tasks it starts from now on, with the call."""
+    _call_sid.set(stream_sid)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name[len(ROOT_LOGGER) + 1:] or record.name,
+            "msg": record.getMessage(),
+        }
+        if record.stream_sid:
+            entry["stream_sid"] = record.stream_sid
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only capture the call context here; formatting happens on the listener thread
+        record.stream_sid = _call_sid.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Runs under the handler's lock, so the count is exact across threads
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[_NonBlockingQueueHandler] = None
+
+
+def dropped_records() -> int:
+    """Records discarded so far because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
+
+
+def _stop_listener() -> None:
+    _listener.stop()
+    if _handler.dropped:
+        # The queue is drained and stopped by now, so this goes straight to the output
+        record = logging.getLogger(f"{ROOT_LOGGER}.logging").makeRecord(
+            f"{ROOT_LOGGER}.logging", logging.WARNING, __file__, 0,
+            "%d log records dropped because the log queue was full", (_handler.dropped,), None)
+        record.stream_sid = None
+        for handler in _listener.handlers:
+            handler.handle(record)
+
+
+def configure_logging() -> None:
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(LOG_LEVEL)
+    _handler = _NonBlockingQueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+    # Drains whatever is still queued at exit, then reports any drops
+    atexit.register(_stop_listener)
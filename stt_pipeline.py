@@ -0,0 +1,118 @@
+import asyncio
+import os
+from typing import Dict, List
+
+from audio_codec import SAMPLE_RATE
+
+# Batch 20 ms Twilio frames into larger Deepgram messages; the flush timer bounds the
+# extra delay when frames stop arriving mid-chunk (jitter, caller on hold).
+STT_COALESCE_MS = int(os.getenv("STT_COALESCE_MS", "100"))
+STT_FLUSH_MS = int(os.getenv("STT_FLUSH_MS", "150"))
+
+# Inbound audio waiting for Deepgram is capped so a stalled STT socket can't grow memory
+# without bound; what happens on overflow is selectable per deployment.
+STT_QUEUE_MAX_FRAMES = int(os.getenv("STT_QUEUE_MAX_FRAMES", "50"))  # 1 s of audio
+STT_QUEUE_POLICY = os.getenv("STT_QUEUE_POLICY", "drop_oldest")
+QUEUE_POLICIES = ("drop_oldest", "drop_newest", "reconnect")
+
+
+class AudioQueue(asyncio.Queue):
+    """
+    Bounded per-call queue of inbound μ-law frames.
+
+    `offer` never blocks the Twilio receiver. When the queue is full it either drops the
+    oldest frame (keeps audio fresh), drops the incoming frame (keeps audio contiguous), or
+    discards the backlog and asks the STT task to reconnect.
+    """
+
+    def __init__(self, maxsize: int = STT_QUEUE_MAX_FRAMES, policy: str = STT_QUEUE_POLICY):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown audio queue policy {policy!r}; expected one of {QUEUE_POLICIES}")
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.reconnect_requested = asyncio.Event()
+
+        self.high_water_mark = 0
+        self.dropped_frames = 0
+        self.overflows = 0
+
+    def offer(self, frame: bytes) -> None:
+        if self.full():
+            self.overflows += 1
+            if self.policy == "drop_newest":
+                self.dropped_frames += 1
+                return
+            if self.policy == "drop_oldest":
+                self.get_nowait()
+                self.dropped_frames += 1
+            else:
+                self.dropped_frames += self.clear()
+                self.reconnect_requested.set()
+
+        self.put_nowait(frame)
+        self.high_water_mark = max(self.high_water_mark, self.qsize())
+
+    def clear(self) -> int:
+        dropped = 0
+        while not self.empty():
+            self.get_nowait()
+            dropped += 1
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_frames": self.maxsize,
+            "high_water_mark": self.high_water_mark,
+            "dropped_frames": self.dropped_frames,
+            "overflows": self.overflows,
+        }
+
+
+class FrameCoalescer:
+    """Collects μ-law frames from the call's audio queue into ~`chunk_ms` chunks."""
+
+    def __init__(self, chunk_ms: int = STT_COALESCE_MS, flush_ms: int = STT_FLUSH_MS):
+        self.chunk_bytes = chunk_ms * SAMPLE_RATE // 1000
+        self.flush_after = flush_ms / 1000
+
+        self.frames_in = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.timer_flushes = 0
+
+    async def next_chunk(self, audio_queue: asyncio.Queue) -> List[bytes]:
+        frames = [await audio_queue.get()]
+        size = len(frames[0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_after
+
+        while size < self.chunk_bytes:
+            if not audio_queue.empty():
+                frame = audio_queue.get_nowait()
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    self.timer_flushes += 1
+                    break
+                try:
+                    frame = await asyncio.wait_for(audio_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    self.timer_flushes += 1
+                    break
+            frames.append(frame)
+            size += len(frame)
+
+        self.frames_in += len(frames)
+        return frames
+
+    def record_sent(self, num_bytes: int) -> None:
+        self.messages_sent += 1
+        self.bytes_sent += num_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames_in": self.frames_in,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "timer_flushes": self.timer_flushes,
+        }
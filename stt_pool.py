@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Tuple
+
+import websockets
+
+from structured_log import get_logger
+
+log = get_logger("stt_pool")
+
+# Idle, authenticated Deepgram listen sockets kept open so a new call skips DNS, TLS and
+# the websocket handshake. Deepgram drops sockets that see no audio for ~10 s, so idle
+# ones get a KeepAlive; old ones are recycled in case the upstream silently drops them.
+STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", "2"))
+STT_POOL_KEEPALIVE_S = float(os.getenv("STT_POOL_KEEPALIVE_S", "5"))
+STT_POOL_MAX_AGE_S = float(os.getenv("STT_POOL_MAX_AGE_S", "300"))
+# Bounds the closing handshake, so closing a socket whose peer stopped reading can't stall
+STT_CLOSE_TIMEOUT_S = float(os.getenv("STT_CLOSE_TIMEOUT_S", "1"))
+
+
+class DeepgramConnectionPool:
+    """Keeps `size` idle Deepgram STT websockets warm and refills in the background."""
+
+    def __init__(self, uri: str, headers: Dict[str, str], size: int = STT_POOL_SIZE):
+        self.uri = uri
+        self.headers = headers
+        self.size = size
+
+        # (websocket, opened_at, handshake seconds)
+        self._idle: deque = deque()
+        self._connecting = 0
+        self._refill_needed = asyncio.Event()
+        self._tasks = []
+
+        self.hits = 0
+        self.misses = 0
+        self.handshake_saved_s = 0.0
+
+    async def start(self) -> None:
+        if self.size <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._refill_loop()), asyncio.create_task(self._keepalive_loop())]
+        self._refill_needed.set()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while self._idle:
+            ws, _, _ = self._idle.popleft()
+            await ws.close()
+
+    async def _connect(self) -> Tuple[websockets.WebSocketClientProtocol, float]:
+        started = time.perf_counter()
+        ws = await websockets.connect(self.uri, extra_headers=self.headers, close_timeout=STT_CLOSE_TIMEOUT_S)
+        return ws, time.perf_counter() - started
+
+    async def acquire(self) -> Tuple[websockets.WebSocketClientProtocol, float]:
+        """
+        Returns an open STT websocket and the handshake time (seconds) the pool saved
+        the caller; 0.0 when no warm connection was available and one was opened inline.
+        """
+        while self._idle:
+            ws, opened_at, handshake_s = self._idle.popleft()
+            self._refill_needed.set()
+            if ws.open and time.monotonic() - opened_at <= STT_POOL_MAX_AGE_S:
+                self.hits += 1
+                self.handshake_saved_s += handshake_s
+                return ws, handshake_s
+            # Due for recycling; the keepalive loop may not have reached it yet
+            await ws.close()
+
+        self.misses += 1
+        self._refill_needed.set()
+        ws, _ = await self._connect()
+        return ws, 0.0
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            while len(self._idle) + self._connecting < self.size:
+                self._connecting += 1
+                try:
+                    ws, handshake_s = await self._connect()
+                except (OSError, websockets.WebSocketException) as e:
+                    log.warning("STT pool connect error: %s", e)
+                    await asyncio.sleep(STT_POOL_KEEPALIVE_S)
+                    continue
+                finally:
+                    self._connecting -= 1
+                self._idle.append((ws, time.monotonic(), handshake_s))
+
+    async def _keepalive_loop(self) -> None:
+        keepalive = json.dumps({"type": "KeepAlive"})
+        while True:
+            await asyncio.sleep(STT_POOL_KEEPALIVE_S)
+            now = time.monotonic()
+            for entry in list(self._idle):
+                # acquire() may have handed it to a call while we awaited an earlier entry
+                if entry not in self._idle:
+                    continue
+                ws, opened_at, _ = entry
+                if ws.open and now - opened_at <= STT_POOL_MAX_AGE_S:
+                    try:
+                        await ws.send(keepalive)
+                        continue
+                    except websockets.ConnectionClosed:
+                        if entry not in self._idle:
+                            continue
+                # Closed upstream or too old: take it out of the pool before awaiting, then replace it
+                self._idle.remove(entry)
+                self._refill_needed.set()
+                await ws.close()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "handshake_saved_ms": round(self.handshake_saved_s * 1000),
+        }
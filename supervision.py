@@ -0,0 +1,82 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# Supervisors can watch a live call's transcripts and agent replies. Each one gets a
+# bounded queue: a slow supervisor loses events (and is told how many) instead of growing
+# memory, and calls nobody is watching pay a single dict lookup per event.
+SUPERVISOR_QUEUE_MAX = int(os.getenv("SUPERVISOR_QUEUE_MAX", "100"))
+
+
+class Subscriber:
+    """One supervisor connection's outbound queue of serialized events."""
+
+    def __init__(self, stream_sid: str, maxsize: int = SUPERVISOR_QUEUE_MAX):
+        self.stream_sid = stream_sid
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._pending_drops = 0
+
+    def offer(self, message: str) -> None:
+        # Leaves room for the drop notice, so the supervisor learns about the gap in order
+        if self.queue.qsize() >= self.queue.maxsize - 1:
+            self.dropped += 1
+            self._pending_drops += 1
+            return
+        if self._pending_drops:
+            self.queue.put_nowait(orjson.dumps({"type": "dropped", "count": self._pending_drops}).decode())
+            self._pending_drops = 0
+            if self.queue.full():
+                self.dropped += 1
+                self._pending_drops += 1
+                return
+        self.queue.put_nowait(message)
+
+    def close(self) -> None:
+        """Ends the subscription; the sender sees None once it has drained the queue."""
+        while self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class SupervisorHub:
+    """Fan-out of per-call events to the supervisors watching each stream SID."""
+
+    def __init__(self):
+        self.active_calls: Dict[str, float] = {}  # stream SID -> start time
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+
+    def listening(self, stream_sid: Optional[str]) -> bool:
+        return stream_sid in self._subscribers
+
+    def call_started(self, stream_sid: str) -> None:
+        self.active_calls[stream_sid] = asyncio.get_running_loop().time()
+
+    def call_ended(self, stream_sid: Optional[str]) -> None:
+        self.active_calls.pop(stream_sid, None)
+        if self.listening(stream_sid):
+            self.publish(stream_sid, {"type": "call_ended"})
+            for subscriber in self._subscribers.pop(stream_sid):
+                subscriber.close()
+
+    def subscribe(self, stream_sid: str) -> Optional[Subscriber]:
+        if stream_sid not in self.active_calls:
+            return None
+        subscriber = Subscriber(stream_sid)
+        self._subscribers.setdefault(stream_sid, []).append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.stream_sid)
+        if subscribers and subscriber in subscribers:
+            subscribers.remove(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.stream_sid]
+
+    def publish(self, stream_sid: str, event: Dict[str, Any]) -> None:
+        """Callers check `listening` first so unwatched calls never build the event."""
+        message = orjson.dumps(event).decode()
+        for subscriber in self._subscribers.get(stream_sid, ()):
+            subscriber.offer(message)
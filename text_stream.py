@@ -0,0 +1,42 @@
+import re
+from typing import AsyncIterator, List
+
+# A sentence ends at . ! ? (optionally followed by a closing quote/bracket) and whitespace;
+# "3.5" or "e.g.x" don't split because nothing but whitespace may follow the punctuation.
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+# Only a whole word counts as an abbreviation: "Dr." holds the sentence, "request." doesn't
+_ABBREVIATION = re.compile(r"(?:^|\s)(?:mr|mrs|ms|dr|st|vs|etc|e\.g|i\.e)\.$", re.IGNORECASE)
+
+
+class SentenceChunker:
+    """Accumulates streamed LLM tokens and releases complete sentences for TTS."""
+
+    def __init__(self):
+        self.pending = ""
+
+    def push(self, token: str) -> List[str]:
+        self.pending += token
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self.pending):
+            candidate = self.pending[start:match.end()].strip()
+            if _ABBREVIATION.search(candidate):
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self.pending = self.pending[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self.pending = self.pending.strip(), ""
+        return rest
+
+
+async def sentences_from_tokens(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    chunker = SentenceChunker()
+    async for token in tokens:
+        for sentence in chunker.push(token):
+            yield sentence
+    rest = chunker.flush()
+    if rest:
+        yield rest
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import random
+import time
+from typing import Dict, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+from structured_log import get_logger
+
+log = get_logger("tracing")
+
+# OpenTelemetry spans for each call: the call itself, its Deepgram STT connections, every
+# turn (with its latency milestones as events) and each TTS request. Messages to the agent
+# carry the W3C traceparent in their metadata, so the agent's turn, and the AssistantAgent's
+# own invoke_agent and tool spans under it, join the call's trace. (The autogen runtime
+# only *links* its send/process spans to the sender, which would start a new trace.)
+#
+# Off by default; without a configured provider the tracer below is a no-op. Exports go to
+# a JSON-lines file or, with TRACE_EXPORTER=otlp, to the collector at
+# OTEL_EXPORTER_OTLP_ENDPOINT (needs opentelemetry-sdk and the OTLP exporter).
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "voice-form-agent")
+
+tracer = trace.get_tracer("voice-form-agent")
+_propagator = TraceContextTextMapPropagator()
+
+
+def init_tracing():
+    """Installs the global tracer provider; returns it (None if tracing is disabled)."""
+    if not TRACING_ENABLED:
+        return None
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if TRACE_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    elif TRACE_EXPORTER == "file":
+        # One finished span per line; written by the batch processor's worker thread
+        trace_file = open(TRACE_FILE, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=trace_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        raise ValueError(f"Unknown TRACE_EXPORTER {TRACE_EXPORTER!r} (expected 'file' or 'otlp')")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACE_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    log.info("🔭 Tracing to %s", TRACE_FILE if TRACE_EXPORTER == "file" else "OTLP collector")
+    return provider
+
+
+def call_trace_context(stream_sid: str) -> otel_context.Context:
+    """
+    Parent context for a call's root span whose trace ID is the stream SID, so a call's
+    trace can be looked up directly by SID. Twilio SIDs are "MZ" + 32 hex digits, exactly
+    a 128-bit trace ID; anything else is hashed. The parent span itself is never recorded.
+    """
+    digits = stream_sid[2:]
+    if len(digits) == 32 and all(c in "0123456789abcdefABCDEF" for c in digits):
+        trace_id = int(digits, 16)
+    else:
+        trace_id = int.from_bytes(hashlib.sha256(stream_sid.encode()).digest()[:16], "big")
+    parent = SpanContext(
+        trace_id=trace_id,
+        span_id=random.getrandbits(64),
+        is_remote=True,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+    )
+    return trace.set_span_in_context(NonRecordingSpan(parent))
+
+
+def inject_trace_context(metadata: Dict[str, str]) -> Dict[str, str]:
+    """Adds the current trace context to a message's metadata and returns it."""
+    _propagator.inject(metadata)
+    return metadata
+
+
+def extract_trace_context(metadata: Dict[str, str]) -> otel_context.Context:
+    return _propagator.extract(metadata)
+
+
+def epoch_ns(perf_counter_s: float) -> int:
+    """Converts a time.perf_counter() reading to a span timestamp."""
+    return time.time_ns() - int((time.perf_counter() - perf_counter_s) * 1e9)
+
+
+def start_call_span(stream_sid: str, call_sid: Optional[str]) -> trace.Span:
+    attributes = {"twilio.stream_sid": stream_sid}
+    if call_sid:
+        attributes["twilio.call_sid"] = call_sid
+    return tracer.start_span("twilio.call", context=call_trace_context(stream_sid), attributes=attributes)
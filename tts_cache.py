@@ -0,0 +1,316 @@
+import asyncio
+import binascii
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from audio_codec import MULAW_FRAME_BYTES, MULAW_SILENCE
+from structured_log import get_logger
+
+log = get_logger("tts_cache")
+
+# Agent utterances repeat across calls (farewells, confirmations, re-asked questions), so
+# synthesized audio is cached by content. Entries are padded to whole 20 ms frames and the
+# memory tier also keeps each frame base64-encoded, ready to drop into a Twilio message.
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "256"))
+
+
+class CachedAudio:
+    """Frame-aligned μ-law audio plus its per-frame base64 payloads."""
+
+    def __init__(self, audio: bytes):
+        if len(audio) % MULAW_FRAME_BYTES:
+            audio += MULAW_SILENCE * (MULAW_FRAME_BYTES - len(audio) % MULAW_FRAME_BYTES)
+        self.audio = audio
+        self.payloads: List[str] = [
+            binascii.b2a_base64(audio[i:i + MULAW_FRAME_BYTES], newline=False).decode("ascii")
+            for i in range(0, len(audio), MULAW_FRAME_BYTES)
+        ]
+        # Raw bytes plus base64 text
+        self.size = len(audio) + sum(map(len, self.payloads))
+
+
+class _InFlight:
+    """One upstream synthesis that any number of callers can read while it streams."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.done = False
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[bytes]:
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.done:
+                return
+            await self._changed.wait()
+
+
+class TTSCache:
+    """
+    Two-tier (memory LRU + disk) content-addressed cache for synthesized μ-law audio, with
+    single-flight upstream requests: identical texts requested at the same time share one
+    synthesis, and every requester hears it as it streams in.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], AsyncIterator[bytes]],
+        voice: str,
+        encoding: str,
+        memory_bytes: int = int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+        disk_dir: str = TTS_CACHE_DIR,
+        disk_bytes: int = int(TTS_CACHE_DISK_MB * 1024 * 1024),
+    ):
+        self._synthesize = synthesize
+        self.voice = voice
+        self.encoding = encoding
+
+        self.memory_bytes = memory_bytes
+        self._memory: "OrderedDict[str, CachedAudio]" = OrderedDict()
+        self._memory_used = 0
+        self._pinned = set()  # pre-rendered prompts that LRU eviction must keep
+
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self._disk_used = self._scan_disk() if disk_dir else 0
+        # Writes run in to_thread workers; this serializes them, eviction and _disk_used
+        self._disk_lock = threading.Lock()
+
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._fetches = set()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.merged = 0
+        self._first_byte_s = 0.0  # running mean of upstream time-to-first-audio
+        self._first_byte_samples = 0
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.voice}\0{self.encoding}\0{text}".encode("utf-8")).hexdigest()
+
+    # ----- lookup -----
+    async def get(self, text: str) -> Optional[CachedAudio]:
+        key = self.key(text)
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+        if self.disk_dir:
+            audio = await asyncio.to_thread(self._read_disk, key)
+            if audio is not None:
+                self.disk_hits += 1
+                entry = CachedAudio(audio)
+                self._remember(key, entry)
+                return entry
+        return None
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        """Yields audio for `text` from cache, an identical in-flight request, or upstream."""
+        entry = await self.get(text)
+        if entry is not None:
+            yield entry.audio
+            return
+        async for chunk in self.fetch(text):
+            yield chunk
+
+    async def fetch(self, text: str) -> AsyncIterator[bytes]:
+        """Yields upstream audio for `text`, sharing the request with identical in-flight ones."""
+        key = self.key(text)
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            self.misses += 1
+            in_flight = self._start_fetch(key, text)
+        else:
+            self.merged += 1
+
+        async for chunk in in_flight.follow():
+            yield chunk
+
+    async def warm(self, text: str, pin: bool = False) -> bool:
+        """
+        Makes sure `text` is cached without counting towards hit/miss stats.
+        Returns True if it had to be synthesized.
+        """
+        key = self.key(text)
+        if pin:
+            self._pinned.add(key)
+        if key in self._memory:
+            return False
+        if self.disk_dir:
+            audio = await asyncio.to_thread(self._read_disk, key)
+            if audio is not None:
+                self._remember(key, CachedAudio(audio))
+                return False
+
+        in_flight = self._in_flight.get(key) or self._start_fetch(key, text)
+        async for _ in in_flight.follow():
+            pass
+        return True
+
+    def unpin(self, text: str) -> None:
+        """Lets LRU eviction drop `text` again, e.g. once a prompt leaves the form."""
+        self._pinned.discard(self.key(text))
+
+    def _start_fetch(self, key: str, text: str) -> _InFlight:
+        in_flight = self._in_flight[key] = _InFlight()
+        # Upstream runs on its own so a caller hanging up or barging in doesn't cut it short
+        fetch = asyncio.create_task(self._fetch(key, text, in_flight))
+        self._fetches.add(fetch)
+        fetch.add_done_callback(self._fetches.discard)
+        return in_flight
+
+    async def _fetch(self, key: str, text: str, in_flight: _InFlight) -> None:
+        started = time.perf_counter()
+        entry = None
+        try:
+            try:
+                async for chunk in self._synthesize(text):
+                    if not in_flight.chunks:
+                        self._record_first_byte(time.perf_counter() - started)
+                    in_flight.append(chunk)
+                if in_flight.chunks:
+                    entry = CachedAudio(b"".join(in_flight.chunks))
+            except Exception:
+                log.exception("TTS cache fetch error")
+            # Only complete syntheses are cached; stored before the in-flight entry goes away
+            if entry is not None:
+                self._remember(key, entry)
+        finally:
+            self._in_flight.pop(key, None)
+            in_flight.finish()
+
+        if entry is not None and self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, entry.audio)
+
+    async def close(self) -> None:
+        for fetch in list(self._fetches):
+            fetch.cancel()
+        await asyncio.gather(*self._fetches, return_exceptions=True)
+
+    # ----- memory tier -----
+    def _remember(self, key: str, entry: CachedAudio) -> None:
+        if entry.size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous.size
+        self._memory[key] = entry
+        self._memory_used += entry.size
+        while self._memory_used > self.memory_bytes:
+            victim = next((k for k in self._memory if k not in self._pinned), None)
+            if victim is None:
+                break
+            self._memory_used -= self._memory.pop(victim).size
+
+    # ----- disk tier -----
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.ulaw")
+
+    def _scan_disk(self) -> int:
+        used = 0
+        for root, _, files in os.walk(self.disk_dir):
+            used += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return used
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            log.exception("TTS cache disk read error")
+            return None
+        try:
+            os.utime(path)  # mtime doubles as last-used time for eviction
+        except FileNotFoundError:
+            pass  # evicted since we read it
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        try:
+            with self._disk_lock:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(audio)
+                existed = os.path.exists(path)
+                os.replace(tmp_path, path)
+                if not existed:
+                    self._disk_used += len(audio)
+                if self._disk_used > self.disk_bytes:
+                    self._evict_disk()
+        except OSError:
+            # The audio is still cached in memory; only the disk copy is lost
+            log.exception("TTS cache disk write error")
+
+    def _evict_disk(self) -> None:
+        """Called with _disk_lock held."""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed since the walk listed it
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        self._disk_used = sum(size for _, size, _ in entries)
+        # Evict down to 90% so we don't rescan on every write near the limit
+        for _, size, path in entries:
+            if self._disk_used <= self.disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._disk_used -= size
+
+    # ----- stats -----
+    def _record_first_byte(self, seconds: float) -> None:
+        self._first_byte_samples += 1
+        self._first_byte_s += (seconds - self._first_byte_s) / self._first_byte_samples
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses + self.merged
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "merged": self.merged,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_used,
+            "disk_bytes": self._disk_used,
+            # Each hit skipped roughly one upstream time-to-first-audio
+            "latency_saved_ms": round(hits * self._first_byte_s * 1000),
+        }
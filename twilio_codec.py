@@ -0,0 +1,92 @@
+import binascii
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import orjson
+
+# Twilio sends ~50 media messages per second per call and we send as many back, so the
+# media shape gets a dedicated path: the payload is sliced straight out of the JSON text
+# instead of building a dict per frame, and outbound messages are pre-templated strings.
+_MEDIA_EVENT = '"event":"media"'
+_PAYLOAD_KEY = '"payload":"'
+_CHUNK_KEY = '"chunk":"'
+_TIMESTAMP_KEY = '"timestamp":"'
+
+
+class InboundMedia(NamedTuple):
+    """One inbound audio frame: `chunk` counts media messages from 1, `timestamp` is ms since the stream started."""
+    audio: bytes
+    chunk: Optional[int]
+    timestamp: Optional[int]
+
+
+def _int_field(raw: str, key: str, end: int) -> Optional[int]:
+    """Integer value of a string field that appears before `end` in the message."""
+    start = raw.find(key, 0, end)
+    if start == -1:
+        return None
+    start += len(key)
+    value = raw[start:raw.find('"', start, end)]
+    return int(value) if value.isdigit() else None
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_message(raw: str) -> Tuple[str, Optional[InboundMedia], Optional[Dict[str, Any]]]:
+    """
+    Parses one Twilio media-stream message.
+
+    Returns ``(event, media, data)``. Media messages take the fast path and come back as
+    ``("media", InboundMedia, None)``; every other event (or an unexpected media layout) is
+    fully parsed and returned as ``(event, None, data)``.
+    """
+    if _MEDIA_EVENT in raw:
+        key = raw.find(_PAYLOAD_KEY)
+        if key != -1:
+            start = key + len(_PAYLOAD_KEY)
+            end = raw.find('"', start)
+            if end != -1:
+                # Twilio puts chunk and timestamp ahead of the payload, so only that prefix is searched
+                media = InboundMedia(
+                    binascii.a2b_base64(raw[start:end]),
+                    _int_field(raw, _CHUNK_KEY, key),
+                    _int_field(raw, _TIMESTAMP_KEY, key),
+                )
+                return "media", media, None
+
+    data = orjson.loads(raw)
+    event = data.get("event")
+    if event == "media":
+        media = data["media"]
+        audio = binascii.a2b_base64(media["payload"])
+        return event, InboundMedia(audio, _optional_int(media.get("chunk")), _optional_int(media.get("timestamp"))), data
+    return event, None, data
+
+
+class MediaSerializer:
+    """Builds outbound Twilio messages for one stream from pre-rendered JSON templates."""
+
+    def __init__(self, streamsid: str):
+        self.streamsid = streamsid
+        sid = orjson.dumps(streamsid).decode()
+        self._media_prefix = '{"event":"media","streamSid":%s,"media":{"payload":"' % sid
+        self._clear = '{"event":"clear","streamSid":%s}' % sid
+        self._mark_prefix = '{"event":"mark","streamSid":%s,"mark":{"name":' % sid
+
+    def media(self, frame: bytes) -> str:
+        return self.media_payload(binascii.b2a_base64(frame, newline=False).decode("ascii"))
+
+    def media_payload(self, payload: str) -> str:
+        """Media message for an already base64-encoded frame (e.g. from the TTS cache)."""
+        return self._media_prefix + payload + '"}}'
+
+    def clear(self) -> str:
+        return self._clear
+
+    def mark(self, name: str) -> str:
+        """Twilio echoes a mark back once all audio sent before it has played."""
+        return self._mark_prefix + orjson.dumps(name).decode() + "}}"
@@ -0,0 +1,102 @@
+import os
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+from audio_codec import MULAW_FRAME_BYTES, SAMPLE_RATE, ULAW_TO_LINEAR
+
+# Local voice-activity gate for the STT uplink. Silence is not sent to Deepgram; a short
+# pre-roll keeps word onsets, and the hangover must outlast Deepgram's endpointing (500 ms)
+# so it still sees the trailing silence it needs to emit speech_final.
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+VAD_THRESHOLD_DBFS = float(os.getenv("VAD_THRESHOLD_DBFS", "-45"))
+VAD_ZCR_MARGIN_DB = float(os.getenv("VAD_ZCR_MARGIN_DB", "8"))
+VAD_ZCR_MIN = float(os.getenv("VAD_ZCR_MIN", "0.25"))
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "200"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "900"))
+VAD_KEEPALIVE_S = float(os.getenv("VAD_KEEPALIVE_S", "5"))
+
+FRAME_MS = MULAW_FRAME_BYTES * 1000 // SAMPLE_RATE
+
+
+def frame_features(frames: List[bytes]):
+    """Per-frame energy (dBFS) and zero-crossing rate for a batch of μ-law frames."""
+    lengths = np.fromiter((len(f) for f in frames), dtype=np.int64, count=len(frames))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    pcm = ULAW_TO_LINEAR[np.frombuffer(b"".join(frames), dtype=np.uint8)].astype(np.float32)
+
+    energy = np.add.reduceat(pcm * pcm, starts) / lengths
+    dbfs = 10 * np.log10(energy / (32768.0 * 32768.0) + 1e-12)
+
+    signs = np.signbit(pcm)
+    crossings = np.empty(len(pcm), dtype=np.int32)
+    crossings[0] = 0
+    np.not_equal(signs[1:], signs[:-1], out=crossings[1:], casting="unsafe")
+    zcr = np.add.reduceat(crossings, starts) / lengths
+    return dbfs, zcr
+
+
+class VoiceActivityGate:
+    """
+    Passes speech frames (plus pre-roll and hangover) and holds back silence.
+
+    Speech is a frame above `threshold_dbfs`, or a slightly quieter frame with a high
+    zero-crossing rate (unvoiced consonants such as "s" and "f" are weak but noisy).
+    """
+
+    def __init__(
+        self,
+        threshold_dbfs: float = VAD_THRESHOLD_DBFS,
+        preroll_ms: int = VAD_PREROLL_MS,
+        hangover_ms: int = VAD_HANGOVER_MS,
+    ):
+        self.threshold_dbfs = threshold_dbfs
+        self.hangover_ms = hangover_ms
+        self.preroll = deque(maxlen=max(1, preroll_ms // FRAME_MS))
+
+        self.open = False
+        self.hangover_left_ms = 0.0
+
+        self.frames_in = 0
+        self.frames_sent = 0
+        self.speech_segments = 0
+        self.keepalives_sent = 0
+
+    def is_speech(self, frames: List[bytes]) -> np.ndarray:
+        dbfs, zcr = frame_features(frames)
+        weak_fricative = (dbfs > self.threshold_dbfs - VAD_ZCR_MARGIN_DB) & (zcr > VAD_ZCR_MIN)
+        return (dbfs > self.threshold_dbfs) | weak_fricative
+
+    def process(self, frames: List[bytes]) -> List[bytes]:
+        """Returns the frames that should be forwarded to STT, in order."""
+        out: List[bytes] = []
+        for frame, speech in zip(frames, self.is_speech(frames)):
+            if speech:
+                if not self.open:
+                    self.open = True
+                    self.speech_segments += 1
+                    out.extend(self.preroll)
+                    self.preroll.clear()
+                self.hangover_left_ms = self.hangover_ms
+                out.append(frame)
+            elif self.open:
+                out.append(frame)
+                self.hangover_left_ms -= len(frame) * 1000 / SAMPLE_RATE
+                if self.hangover_left_ms <= 0:
+                    self.open = False
+            else:
+                self.preroll.append(frame)
+
+        self.frames_in += len(frames)
+        self.frames_sent += len(out)
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "frames_in": self.frames_in,
+            "frames_sent": self.frames_sent,
+            "speech_segments": self.speech_segments,
+            "keepalives_sent": self.keepalives_sent,
+            "sent_ratio": round(self.frames_sent / self.frames_in, 3) if self.frames_in else 0.0,
+        }